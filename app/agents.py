@@ -1,14 +1,19 @@
 from langgraph.graph import StateGraph
-from typing import Annotated, TypedDict, List, Optional, Dict, Any, AsyncGenerator
+from typing import List, Optional, Dict, Any, AsyncGenerator
 from loguru import logger
+from array import array
+from dataclasses import dataclass, field, replace
 import asyncio
+import orjson
+import re
 
 from app.services.market_data import (
     fetch_current_price,
     fetch_financial_metrics,
     fetch_analyst_ratings,
     fetch_earnings_data,
-    get_company_name
+    get_company_name,
+    validate_stock_symbol
 )
 from app.services.sentiment import fetch_comprehensive_sentiment
 from app.schemas import (
@@ -28,78 +33,118 @@ from app.utils.error_handling import (
 
 from app.utils.monitoring import track_performance
 
+# First BUY/HOLD/SELL word in an analyst rating string
+_RATING_RE = re.compile(r"\b(BUY|HOLD|SELL)\b", re.IGNORECASE)
+
+# Compact per-rating codes (index into RATING_LABELS, -1 if unclassified)
+RATING_LABELS = ("BUY", "HOLD", "SELL")
+_RATING_CODE = {label: code for code, label in enumerate(RATING_LABELS)}
+
+# price, fundamentals, analyst, sentiment, company
+TOTAL_AGENTS = 5
+
+# Progress for every (completed agents, validated agents) pair: 85% for agent
+# completion, 10% for validation, and the final 5% once all agents are done
+_PROGRESS_TABLE = tuple(
+    tuple(
+        min(100, int((completed / TOTAL_AGENTS) * 85 +
+                     (validated / TOTAL_AGENTS) * 10 +
+                     (5 if completed == TOTAL_AGENTS else 0)))
+        for validated in range(TOTAL_AGENTS + 1)
+    )
+    for completed in range(TOTAL_AGENTS + 1)
+)
+
+# Shared fallbacks for failed or missing data (both models are frozen)
+_EMPTY_METRICS = FinancialMetrics()
+_EMPTY_SENTIMENT = SentimentSummary(
+    overall_score=SentimentScore.NEUTRAL,
+    confidence=0.0,
+    positive_count=0,
+    negative_count=0,
+    neutral_count=0,
+    summary_text="Sentiment analysis unavailable"
+)
+_NO_SENTIMENT = _EMPTY_SENTIMENT.model_copy(
+    update={"summary_text": "No sentiment data available"})
+
 # Enhanced state for streaming
 
 
-class GraphState(TypedDict, total=False):
-    """Enhanced state for the multi-agent system with streaming support"""
+@dataclass(slots=True)
+class GraphState:
+    """Enhanced state for the multi-agent system with streaming support
+
+    Slotted so agents read fields as attributes rather than dict lookups.
+    Agents still return plain dict updates, merged by merge_agent_result.
+    """
     # Input
-    symbol: Annotated[str, "broadcast"]
+    symbol: str
 
     # Price data
-    price_data: Dict[str, Any]
-    price_error: Optional[str]
-    price_status: str  # 'pending', 'success', 'failed'
+    price_data: Optional[Dict[str, Any]] = None
+    price_error: Optional[str] = None
+    price_status: str = 'pending'  # 'pending', 'success', 'failed'
 
     # Financial metrics
-    financial_metrics: FinancialMetrics
-    fundamentals_error: Optional[str]
-    fundamentals_status: str
+    financial_metrics: Optional[FinancialMetrics] = None
+    fundamentals_error: Optional[str] = None
+    fundamentals_status: str = 'pending'
 
     # Analyst data
-    analyst_ratings: List[AnalystRating]
-    analyst_error: Optional[str]
-    analyst_status: str
+    analyst_ratings: List[AnalystRating] = field(default_factory=list)
+    analyst_rating_codes: array = field(
+        default_factory=lambda: array('b'))  # parallel to analyst_ratings
+    analyst_error: Optional[str] = None
+    analyst_status: str = 'pending'
 
     # Earnings data
-    earnings_data: List[EarningsData]
-    earnings_error: Optional[str]
-    earnings_status: str
+    earnings_data: List[EarningsData] = field(default_factory=list)
+    earnings_error: Optional[str] = None
+    earnings_status: str = 'pending'
 
     # Sentiment data
-    sentiment_items: List[SentimentItem]
-    sentiment_summary: SentimentSummary
-    sentiment_error: Optional[str]
-    sentiment_status: str
+    sentiment_items: List[SentimentItem] = field(default_factory=list)
+    sentiment_summary: Optional[SentimentSummary] = None
+    sentiment_error: Optional[str] = None
+    sentiment_status: str = 'pending'
 
     # Company info
-    company_name: Optional[str]
-    company_status: str
+    company_name: Optional[str] = None
+    company_error: Optional[str] = None
+    company_status: str = 'pending'
 
     # Coordination metadata
-    agents_completed: List[str]
-    validation_results: Dict[str, bool]
-    overall_status: str  # 'initializing', 'processing', 'validating', 'complete', 'error'
-    progress_percentage: int
+    agents_completed: set[str] = field(default_factory=set)
+    validation_results: Dict[str, bool] = field(default_factory=dict)
+    overall_status: str = 'initializing'  # 'initializing', 'processing', 'validating', 'complete', 'error'
+    progress_percentage: int = 0
 
     # Metadata
-    data_sources: List[str]
-    processing_errors: List[str]
-    partial_data: bool
+    data_sources: set[str] = field(default_factory=set)
+    processing_errors: List[str] = field(default_factory=list)
+    partial_data: bool = False
 
 
-async def root_node(state: dict) -> dict:
+async def root_node(state: GraphState) -> dict:
     """Initialize the analysis with better state management"""
-    logger.debug(f"Initializing analysis for {state['symbol']}")
+    logger.debug(f"Initializing analysis for {state.symbol}")
 
-    # Initialize all status fields
-    enhanced_state = state.copy()
-    enhanced_state.update({
+    # Initialize all status fields (returned as an update to the input state)
+    return {
         'price_status': 'pending',
         'fundamentals_status': 'pending',
         'analyst_status': 'pending',
         'sentiment_status': 'pending',
         'company_status': 'pending',
-        'agents_completed': [],
+        'agents_completed': set(),
         'validation_results': {},
         'overall_status': 'initializing',
         'progress_percentage': 0,
-        'data_sources': [],
+        'data_sources': set(),
         'processing_errors': [],
         'partial_data': False
-    })
-
-    return enhanced_state
+    }
 
 
 class CoordinatingAgent:
@@ -114,9 +159,9 @@ class CoordinatingAgent:
             'company': self._validate_company_data
         }
 
-    def _validate_price_data(self, state: dict) -> tuple[bool, str]:
+    def _validate_price_data(self, state: GraphState) -> tuple[bool, str]:
         """Validate price data completeness and accuracy"""
-        price_data = state.get('price_data')
+        price_data = state.price_data
         if not price_data:
             return False, "No price data available"
 
@@ -130,39 +175,32 @@ class CoordinatingAgent:
 
         return True, "Price data validated successfully"
 
-    def _validate_financial_metrics(self, state: dict) -> tuple[bool, str]:
+    def _validate_financial_metrics(self, state: GraphState) -> tuple[bool, str]:
         """Validate financial metrics"""
-        metrics = state.get('financial_metrics')
+        metrics = state.financial_metrics
         if not metrics:
             return False, "No financial metrics available (rate limited)"
 
         # For rate-limited data, this is acceptable
         return True, "Financial metrics processed (may be limited due to API constraints)"
 
-    def _validate_analyst_data(self, state: dict) -> tuple[bool, str]:
+    def _validate_analyst_data(self, state: GraphState) -> tuple[bool, str]:
         """Validate analyst ratings"""
-        ratings = state.get('analyst_ratings', [])
+        ratings = state.analyst_ratings
         if not ratings:
             return False, "No analyst ratings available"
 
-        # Check if ratings have proper structure
-        for rating in ratings:
-            # Handle both dict and Pydantic model formats
-            if hasattr(rating, 'firm'):  # Pydantic model
-                if not rating.firm or not rating.rating:
-                    return False, "Invalid rating structure"
-            elif isinstance(rating, dict):  # Dictionary
-                if not rating.get('firm') or not rating.get('rating'):
-                    return False, "Invalid rating structure"
-            else:
-                return False, "Unknown rating format"
+        # Check if ratings have proper structure (analyst_agent normalizes
+        # them to AnalystRating models)
+        if not all(rating.firm and rating.rating for rating in ratings):
+            return False, "Invalid rating structure"
 
         return True, f"Validated {len(ratings)} analyst ratings"
 
-    def _validate_sentiment_data(self, state: dict) -> tuple[bool, str]:
+    def _validate_sentiment_data(self, state: GraphState) -> tuple[bool, str]:
         """Validate sentiment analysis results"""
-        sentiment_items = state.get('sentiment_items', [])
-        sentiment_summary = state.get('sentiment_summary')
+        sentiment_items = state.sentiment_items
+        sentiment_summary = state.sentiment_summary
 
         if not sentiment_items and not sentiment_summary:
             return False, "No sentiment data available"
@@ -172,15 +210,15 @@ class CoordinatingAgent:
 
         return True, f"Validated sentiment data with {len(sentiment_items)} articles"
 
-    def _validate_company_data(self, state: dict) -> tuple[bool, str]:
+    def _validate_company_data(self, state: GraphState) -> tuple[bool, str]:
         """Validate company information"""
-        company_name = state.get('company_name')
+        company_name = state.company_name
         if not company_name:
             return False, "Company name not available"
 
         return True, f"Company validated: {company_name}"
 
-    async def validate_agent_result(self, agent_name: str, state: dict) -> dict:
+    async def validate_agent_result(self, agent_name: str, state: GraphState) -> GraphState:
         """Validate individual agent results and update state"""
         validator = self.agent_validators.get(agent_name)
         if not validator:
@@ -190,10 +228,7 @@ class CoordinatingAgent:
         is_valid, message = validator(state)
 
         # Update validation results
-        validation_results = state.get('validation_results', {})
-        validation_results[agent_name] = is_valid
-
-        state['validation_results'] = validation_results
+        state.validation_results[agent_name] = is_valid
 
         if is_valid:
             logger.info(f"✅ {agent_name.title()} agent validation: {message}")
@@ -201,136 +236,85 @@ class CoordinatingAgent:
             logger.warning(
                 f"⚠️ {agent_name.title()} agent validation failed: {message}")
             # Add to processing errors but continue
-            errors = state.get('processing_errors', [])
-            errors.append(f"{agent_name}: {message}")
-            state['processing_errors'] = errors
+            state.processing_errors.append(f"{agent_name}: {message}")
 
         return state
 
-    async def calculate_progress(self, state: dict) -> int:
+    def calculate_progress(self, state: GraphState) -> int:
         """Calculate overall progress based on completed agents"""
-        completed = state.get('agents_completed', [])
-        total_agents = 5  # price, fundamentals, analyst, sentiment, company
-
-        base_progress = (len(completed) / total_agents) * \
-            85  # 85% for agent completion
-
-        # Add validation progress
-        validation_results = state.get('validation_results', {})
-        validation_progress = (len(validation_results) /
-                               total_agents) * 10  # 10% for validation
-
-        # Final 5% for response formatting
-        formatting_progress = 5 if len(completed) == total_agents else 0
-
-        return min(100, int(base_progress + validation_progress + formatting_progress))
+        completed = len(state.agents_completed)
+        validated = len(state.validation_results)
+        return _PROGRESS_TABLE[min(completed, TOTAL_AGENTS)][min(validated, TOTAL_AGENTS)]
 
 
 coordinating_agent = CoordinatingAgent()
 
 
+# Agents return only the keys they set; collection-valued keys in
+# MERGE_EXTEND_KEYS are combined into the shared state by merge_agent_result.
 @track_performance("agent_price")
-async def price_agent(state: dict) -> dict:
+async def price_agent(state: GraphState) -> dict:
     """Enhanced price agent with status tracking"""
-    symbol = state["symbol"]
-    result = state.copy()
-    result['price_status'] = 'processing'
+    symbol = state.symbol
 
     with ErrorContext("price_agent", symbol):
         try:
             # Fetch comprehensive price data
             price_data = await fetch_current_price(symbol)
 
-            # Add data source to tracking
-            data_sources = state.get("data_sources", []).copy()
-            data_sources.append(price_data.get("source", "unknown"))
-
-            # Return the complete updated state
-            result.update({
-                "price_data": price_data,
-                "data_sources": data_sources,
-                "price_status": "success"
-            })
-
-            # Add to completed agents
-            completed = result.get('agents_completed', [])
-            if 'price' not in completed:
-                completed.append('price')
-            result['agents_completed'] = completed
-
             logger.info(
                 f"Price agent succeeded for {symbol}: ${price_data.get('price', 'N/A')}")
-            return result
+            return {
+                "price_data": price_data,
+                "price_status": "success",
+                "data_sources": {price_data.get("source", "unknown")},
+                "agents_completed": {"price"}
+            }
 
         except Exception as e:
             logger.error(f"Price agent failed for {symbol}: {e}")
-            errors = state.get("processing_errors", []).copy()
-            errors.append(f"Price fetch failed: {str(e)}")
-
-            result.update({
+            return {
                 "price_error": str(e),
-                "processing_errors": errors,
-                "partial_data": True,
-                "price_status": "failed"
-            })
-            return result
+                "price_status": "failed",
+                "processing_errors": [f"Price fetch failed: {str(e)}"],
+                "partial_data": True
+            }
 
 
 @track_performance("agent_fundamentals")
-async def fundamentals_agent(state: dict) -> dict:
+async def fundamentals_agent(state: GraphState) -> dict:
     """Enhanced fundamentals agent with status tracking"""
-    symbol = state["symbol"]
-    result = state.copy()
-    result['fundamentals_status'] = 'processing'
+    symbol = state.symbol
 
     with ErrorContext("fundamentals_agent", symbol):
         try:
             # Fetch comprehensive financial metrics
             financial_metrics = await fetch_financial_metrics(symbol)
 
-            # Add data source to tracking
-            data_sources = state.get("data_sources", []).copy()
-            data_sources.append("yfinance_fundamentals")
-
-            result.update({
-                "financial_metrics": financial_metrics,
-                "data_sources": data_sources,
-                "fundamentals_status": "success"
-            })
-
-            # Add to completed agents
-            completed = result.get('agents_completed', [])
-            if 'fundamentals' not in completed:
-                completed.append('fundamentals')
-            result['agents_completed'] = completed
-
             logger.info(f"Fundamentals agent succeeded for {symbol}")
-            return result
+            return {
+                "financial_metrics": financial_metrics,
+                "fundamentals_status": "success",
+                "data_sources": {"yfinance_fundamentals"},
+                "agents_completed": {"fundamentals"}
+            }
 
         except Exception as e:
             logger.error(f"Fundamentals agent failed for {symbol}: {e}")
-            errors = state.get("processing_errors", []).copy()
-            errors.append(f"Fundamentals fetch failed: {str(e)}")
-
             # Provide empty financial metrics as fallback
-            empty_metrics = FinancialMetrics()
-
-            result.update({
-                "financial_metrics": empty_metrics,
+            return {
+                "financial_metrics": _EMPTY_METRICS,
                 "fundamentals_error": str(e),
-                "processing_errors": errors,
-                "partial_data": True,
-                "fundamentals_status": "failed"
-            })
-            return result
+                "fundamentals_status": "failed",
+                "processing_errors": [f"Fundamentals fetch failed: {str(e)}"],
+                "partial_data": True
+            }
 
 
 @track_performance("agent_analyst")
-async def analyst_agent(state: dict) -> dict:
+async def analyst_agent(state: GraphState) -> dict:
     """Enhanced analyst agent with status tracking"""
-    symbol = state["symbol"]
-    result = state.copy()
-    result['analyst_status'] = 'processing'
+    symbol = state.symbol
 
     with ErrorContext("analyst_agent", symbol):
         try:
@@ -338,176 +322,235 @@ async def analyst_agent(state: dict) -> dict:
             analyst_ratings = await fetch_analyst_ratings(symbol)
             earnings_data = await fetch_earnings_data(symbol)
 
+            # Normalize ratings to models once so downstream code sees one type
+            analyst_ratings = [
+                rating if isinstance(rating, AnalystRating) else AnalystRating(**rating)
+                for rating in analyst_ratings
+            ]
+            rating_codes = encode_ratings(analyst_ratings)
+
             # Add data sources to tracking
-            data_sources = state.get("data_sources", []).copy()
+            data_sources = set()
             if analyst_ratings:
-                data_sources.append("finnhub_analysts")
+                data_sources.add("finnhub_analysts")
             if earnings_data:
-                data_sources.append("yfinance_earnings")
+                data_sources.add("yfinance_earnings")
 
-            result.update({
+            logger.info(
+                f"Analyst agent succeeded for {symbol}: {len(analyst_ratings)} ratings, {len(earnings_data)} earnings")
+            return {
                 "analyst_ratings": analyst_ratings,
+                "analyst_rating_codes": rating_codes,
                 "earnings_data": earnings_data,
+                "analyst_status": "success",
                 "data_sources": data_sources,
-                "analyst_status": "success"
-            })
-
-            # Add to completed agents
-            completed = result.get('agents_completed', [])
-            if 'analyst' not in completed:
-                completed.append('analyst')
-            result['agents_completed'] = completed
-
-            logger.info(
-                f"Analyst agent succeeded for {symbol}: {len(analyst_ratings)} ratings, {len(earnings_data)} earnings")
-            return result
+                "agents_completed": {"analyst"}
+            }
 
         except Exception as e:
             logger.error(f"Analyst agent failed for {symbol}: {e}")
-            errors = state.get("processing_errors", []).copy()
-            errors.append(f"Analyst data fetch failed: {str(e)}")
-
-            result.update({
+            return {
                 "analyst_ratings": [],
                 "earnings_data": [],
                 "analyst_error": str(e),
-                "processing_errors": errors,
-                "partial_data": True,
-                "analyst_status": "failed"
-            })
-            return result
+                "analyst_status": "failed",
+                "processing_errors": [f"Analyst data fetch failed: {str(e)}"],
+                "partial_data": True
+            }
 
 
 @track_performance("agent_sentiment")
-async def sentiment_agent(state: dict) -> dict:
+async def sentiment_agent(state: GraphState) -> dict:
     """Enhanced sentiment agent with status tracking"""
-    symbol = state["symbol"]
-    result = state.copy()
-    result['sentiment_status'] = 'processing'
+    symbol = state.symbol
 
     with ErrorContext("sentiment_agent", symbol):
         try:
             # Fetch comprehensive sentiment analysis
             sentiment_items, sentiment_summary = await fetch_comprehensive_sentiment(symbol)
 
-            # Add data sources to tracking
-            data_sources = state.get("data_sources", []).copy()
-            data_sources.extend(["newsapi", "rss_feeds"])
-
-            result.update({
-                "sentiment_items": sentiment_items,
-                "sentiment_summary": sentiment_summary,
-                "data_sources": data_sources,
-                "sentiment_status": "success"
-            })
-
-            # Add to completed agents
-            completed = result.get('agents_completed', [])
-            if 'sentiment' not in completed:
-                completed.append('sentiment')
-            result['agents_completed'] = completed
-
             logger.info(
                 f"Sentiment agent succeeded for {symbol}: {len(sentiment_items)} articles, {sentiment_summary.overall_score.value} sentiment")
-            return result
+            return {
+                "sentiment_items": sentiment_items,
+                "sentiment_summary": sentiment_summary,
+                "sentiment_status": "success",
+                "data_sources": {"newsapi", "rss_feeds"},
+                "agents_completed": {"sentiment"}
+            }
 
         except Exception as e:
             logger.error(f"Sentiment agent failed for {symbol}: {e}")
-            errors = state.get("processing_errors", []).copy()
-            errors.append(f"Sentiment analysis failed: {str(e)}")
-
             # Provide empty sentiment as fallback
-            empty_sentiment = SentimentSummary(
-                overall_score=SentimentScore.NEUTRAL,
-                confidence=0.0,
-                positive_count=0,
-                negative_count=0,
-                neutral_count=0,
-                summary_text="Sentiment analysis unavailable"
-            )
-
-            result.update({
+            return {
                 "sentiment_items": [],
-                "sentiment_summary": empty_sentiment,
+                "sentiment_summary": _EMPTY_SENTIMENT,
                 "sentiment_error": str(e),
-                "processing_errors": errors,
-                "partial_data": True,
-                "sentiment_status": "failed"
-            })
-            return result
+                "sentiment_status": "failed",
+                "processing_errors": [f"Sentiment analysis failed: {str(e)}"],
+                "partial_data": True
+            }
 
 
 @track_performance("agent_company_info")
-async def company_info_agent(state: dict) -> dict:
+async def company_info_agent(state: GraphState) -> dict:
     """Enhanced company info agent with status tracking"""
-    symbol = state["symbol"]
-    result = state.copy()
-    result['company_status'] = 'processing'
+    symbol = state.symbol
 
     with ErrorContext("company_info_agent", symbol):
         try:
             company_name = await get_company_name(symbol)
 
-            result.update({
-                "company_name": company_name,
-                "company_status": "success"
-            })
-
-            # Add to completed agents
-            completed = result.get('agents_completed', [])
-            if 'company' not in completed:
-                completed.append('company')
-            result['agents_completed'] = completed
-
             logger.info(
                 f"Company info agent succeeded for {symbol}: {company_name}")
-            return result
+            return {
+                "company_name": company_name,
+                "company_status": "success",
+                "agents_completed": {"company"}
+            }
 
         except Exception as e:
             logger.warning(f"Company info agent failed for {symbol}: {e}")
-            result.update({
+            return {
                 "company_name": None,
                 "company_status": "failed"
-            })
-            return result
+            }
+
+
+# Agents in the order they are launched
+AGENTS = [
+    ("price", price_agent),
+    ("fundamentals", fundamentals_agent),
+    ("analyst", analyst_agent),
+    ("sentiment", sentiment_agent),
+    ("company", company_info_agent)
+]
+
+# Per-agent time budgets (seconds). A slow agent reports empty data instead
+# of holding up the others, so the whole analysis takes at most the largest.
+AGENT_TIMEOUTS = {
+    "price": 3.0,
+    "fundamentals": 5.0,
+    "analyst": 5.0,
+    "sentiment": 8.0,
+    "company": 2.0
+}
+
+# Empty data an agent reports when it times out (mirrors its failure branch)
+_AGENT_FALLBACKS = {
+    "price": {},
+    "fundamentals": {"financial_metrics": _EMPTY_METRICS},
+    "analyst": {"analyst_ratings": [], "earnings_data": []},
+    "sentiment": {"sentiment_items": [], "sentiment_summary": _EMPTY_SENTIMENT},
+    "company": {"company_name": None}
+}
+
+
+async def run_agent_with_timeout(agent_name: str, agent_func, state: GraphState) -> dict:
+    """Run an agent within its time budget, returning a failure update on timeout"""
+    try:
+        async with asyncio.timeout(AGENT_TIMEOUTS[agent_name]):
+            return await agent_func(state)
+    except TimeoutError:
+        logger.warning(
+            f"{agent_name.title()} agent timed out for {state.symbol} "
+            f"after {AGENT_TIMEOUTS[agent_name]:.0f}s")
+        return {
+            **_AGENT_FALLBACKS[agent_name],
+            f"{agent_name}_error": "Timed out",
+            f"{agent_name}_status": "failed",
+            "processing_errors": [f"{agent_name.title()} agent timed out"],
+            "partial_data": True
+        }
+    except Exception as e:
+        # Agents handle their own errors; this only catches unexpected ones
+        logger.error(f"{agent_name.title()} agent failed with exception: {e}")
+        return {"processing_errors": [str(e)]}
+
+
+# State keys whose agent updates are combined rather than overwritten
+MERGE_EXTEND_KEYS = frozenset(
+    {"data_sources", "processing_errors", "agents_completed"})
+
+
+def merge_agent_result(state: GraphState, result: dict) -> GraphState:
+    """Merge an agent's update into the shared state in place"""
+    for key, value in result.items():
+        if key in MERGE_EXTEND_KEYS:
+            # Combine the few collection-valued keys explicitly
+            if isinstance(value, set):
+                setattr(state, key, getattr(state, key) | value)
+            elif isinstance(value, list):
+                setattr(state, key, getattr(state, key) + value)
+        elif value is not None:
+            # Everything else is a straight update - skip None so a failed
+            # agent can't clobber data that is already present
+            setattr(state, key, value)
+
+    return state
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize types orjson doesn't handle natively"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Serialize a streaming event to JSON bytes"""
+    return orjson.dumps(event, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
 
 
 # Helper functions for response formatting
-def calculate_consensus_rating(ratings: List[AnalystRating]) -> Optional[str]:
-    """Calculate consensus rating from analyst ratings"""
+def encode_ratings(ratings: List[AnalystRating]) -> array:
+    """Classify each rating once into a compact array of RATING_LABELS codes"""
+    codes = array('b')
+    for rating in ratings:
+        match = _RATING_RE.search(rating.rating or "")
+        codes.append(_RATING_CODE[match.group(1).upper()] if match else -1)
+    return codes
+
+
+def calculate_consensus_rating(ratings: List[AnalystRating],
+                               rating_codes: Optional[array] = None) -> Optional[str]:
+    """Calculate consensus rating from analyst ratings
+
+    Pass the analyst_rating_codes from the state to skip re-classifying.
+    """
     if not ratings:
         return None
 
-    # Simple consensus logic - this could be enhanced
-    rating_counts = {}
-    for rating in ratings:
-        rating_text = rating.rating.upper()
-        if "BUY" in rating_text:
-            rating_counts["BUY"] = rating_counts.get("BUY", 0) + 1
-        elif "HOLD" in rating_text:
-            rating_counts["HOLD"] = rating_counts.get("HOLD", 0) + 1
-        elif "SELL" in rating_text:
-            rating_counts["SELL"] = rating_counts.get("SELL", 0) + 1
-
-    if rating_counts:
-        consensus = max(rating_counts, key=rating_counts.get)
-        return consensus
+    if rating_codes is None:
+        rating_codes = encode_ratings(ratings)
+
+    # Simple consensus logic - count each code with array.count (C loop);
+    # ties resolve in RATING_LABELS order
+    counts = [rating_codes.count(code) for code in range(len(RATING_LABELS))]
+    best = max(range(len(counts)), key=counts.__getitem__)
+    if counts[best]:
+        return RATING_LABELS[best]
 
     return "HOLD"  # Default consensus
 
 
-async def stream_coordinated_analysis(symbol: str) -> AsyncGenerator[Dict[str, Any], None]:
-    """Stream coordinated multi-agent analysis with real-time validation"""
+async def stream_coordinated_analysis(symbol: str) -> AsyncGenerator[bytes, None]:
+    """Stream coordinated multi-agent analysis with real-time validation
 
-    # Validate symbol format first before doing anything else
-    from app.services.market_data import validate_stock_symbol
-    validate_stock_symbol(symbol)
+    Each event is yielded as JSON-encoded bytes, ready to be framed for SSE.
+    """
+
+    # Validate symbol format first before doing anything else; the agents
+    # pass the validated symbol on so the fetchers don't re-check it
+    symbol = validate_stock_symbol(symbol)
 
     # Initialize state
-    state = {"symbol": symbol}
-    state = await root_node(state)
+    state = GraphState(symbol=symbol)
+    merge_agent_result(state, await root_node(state))
 
-    yield {
+    yield encode_event({
         "status": "started",
         "message": f"🚀 Starting coordinated analysis for {symbol}",
         "progress": 0,
@@ -518,9 +561,9 @@ async def stream_coordinated_analysis(symbol: str) -> AsyncGenerator[Dict[str, A
             "sentiment": "pending",
             "company": "pending"
         }
-    }
+    })
 
-    # Run agents sequentially with validation
+    # Run agents concurrently, validating and streaming each as it finishes
     agents = [
         ("price", price_agent, "📈 Fetching real-time price data..."),
         ("fundamentals", fundamentals_agent, "💼 Analyzing financial metrics..."),
@@ -529,86 +572,108 @@ async def stream_coordinated_analysis(symbol: str) -> AsyncGenerator[Dict[str, A
         ("company", company_info_agent, "🏢 Retrieving company information...")
     ]
 
-    for i, (agent_name, agent_func, message) in enumerate(agents):
-        # Update progress
-        progress = int((i / len(agents)) * 80)  # 80% for agents
-        yield {
-            "status": "processing",
-            "message": message,
-            "progress": progress,
-            "current_agent": agent_name
-        }
+    async def run_agent(agent_name: str, agent_func) -> tuple[str, dict]:
+        return agent_name, await run_agent_with_timeout(agent_name, agent_func, state)
 
-        # Run agent
-        state = await agent_func(state)
+    # Start every agent before the first yield, so the finally below owns
+    # all of the tasks whenever the consumer stops reading
+    tasks = [asyncio.create_task(run_agent(agent_name, agent_func))
+             for agent_name, agent_func, _ in agents]
 
-        # Validate results
-        state = await coordinating_agent.validate_agent_result(agent_name, state)
+    try:
+        # No progress field: all agents start at once, so nothing has
+        # progressed yet and clients keep the last value they showed
+        for agent_name, _, message in agents:
+            yield encode_event({
+                "status": "processing",
+                "message": message,
+                "current_agent": agent_name
+            })
 
-        # Calculate dynamic progress
-        progress = await coordinating_agent.calculate_progress(state)
+        for next_done in asyncio.as_completed(tasks):
+            agent_name, result = await next_done
 
-        # Stream partial results
-        validation = state.get('validation_results', {}).get(agent_name, False)
-        agent_status = "success" if validation else "warning"
+            # Merge the agent's update into the shared state
+            merge_agent_result(state, result)
 
-        yield {
-            "status": "agent_complete",
-            "message": f"✅ {agent_name.title()} agent completed",
-            "progress": progress,
-            "agent": agent_name,
-            "agent_status": agent_status,
-            "partial_data": {
-                agent_name: state.get(
-                    f"{agent_name}_data") or state.get(agent_name)
-            }
-        }
+            # Validate results
+            state = await coordinating_agent.validate_agent_result(agent_name, state)
+
+            # Calculate dynamic progress
+            progress = coordinating_agent.calculate_progress(state)
+
+            # Stream partial results
+            validation = state.validation_results.get(agent_name, False)
+            agent_status = "success" if validation else "warning"
+
+            yield encode_event({
+                "status": "agent_complete",
+                "message": f"✅ {agent_name.title()} agent completed",
+                "progress": progress,
+                "agent": agent_name,
+                "agent_status": agent_status,
+                "partial_data": {
+                    agent_name: getattr(state, f"{agent_name}_data", None)
+                }
+            })
+    finally:
+        # Stop outstanding agents if the consumer goes away early
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
     # Final validation and response formatting
-    yield {
+    yield encode_event({
         "status": "finalizing",
         "message": "🔄 Validating results and formatting response...",
         "progress": 95
-    }
+    })
 
     try:
         response = format_response(symbol, state)
 
-        # Convert to dict and handle datetime serialization
-        response_dict = response.model_dump(mode='json')
+        # Serialize the response straight to JSON in pydantic-core and embed
+        # it as-is, skipping the intermediate dict
+        response_json = orjson.Fragment(response.model_dump_json())
 
-        yield {
+        yield encode_event({
             "status": "complete",
             "message": f"✅ Analysis complete for {symbol}",
             "progress": 100,
-            "data": response_dict,
-            "validation_summary": state.get('validation_results', {}),
-            "data_sources": state.get('data_sources', [])
-        }
+            "data": response_json,
+            "validation_summary": state.validation_results,
+            "data_sources": sorted(state.data_sources)
+        })
 
     except Exception as e:
         logger.error(f"Response formatting failed: {e}")
-        yield {
+        yield encode_event({
             "status": "error",
             "message": f"❌ Failed to format final response: {str(e)}",
             "progress": 100,
             "error": str(e)
-        }
+        })
 
 
-def format_response(symbol: str, state: dict) -> StockResponse:
+def format_response(symbol: str, state: GraphState) -> StockResponse:
     """Enhanced response formatter with validation and partial data support"""
     with ErrorContext("response_formatting", symbol):
-        # Find price data - but allow partial responses without it
-        price_data = state.get("price_data")
+        # Read everything from the state once - price data may be missing,
+        # partial responses are allowed
+        price_data = state.price_data
+        financial_metrics = state.financial_metrics
+        analyst_ratings = state.analyst_ratings
+        earnings_data = state.earnings_data
+        sentiment_items = state.sentiment_items
+        sentiment_summary = state.sentiment_summary
+        company_name = state.company_name
+        data_sources = state.data_sources
 
         # Check if we have ANY valid data to create a response
-        has_fundamentals = state.get("financial_metrics") is not None
-        has_analyst = state.get("analyst_ratings") and len(
-            state.get("analyst_ratings", [])) > 0
-        has_sentiment = state.get("sentiment_items") and len(
-            state.get("sentiment_items", [])) > 0
-        has_company = state.get("company_name") is not None
+        has_fundamentals = financial_metrics is not None
+        has_analyst = bool(analyst_ratings)
+        has_sentiment = bool(sentiment_items)
+        has_company = company_name is not None
 
         # If we have no data at all, that's an error
         if not any([price_data, has_fundamentals, has_analyst, has_sentiment, has_company]):
@@ -642,44 +707,31 @@ def format_response(symbol: str, state: dict) -> StockResponse:
                 change_percent = price_data.get("change_percent")
                 volume = price_data.get("volume")
 
-        financial_metrics = state.get("financial_metrics", [])
-        analyst_ratings = state.get("analyst_ratings", [])
-        earnings_data = state.get("earnings_data", [])
-        sentiment_items = state.get("sentiment_items", [])
-        sentiment_summary = state.get("sentiment_summary", [])
-
         # Ensure we have a sentiment summary
         if not sentiment_summary:
-            sentiment_summary = SentimentSummary(
-                overall_score=SentimentScore.NEUTRAL,
-                confidence=0.0,
-                positive_count=0,
-                negative_count=0,
-                neutral_count=0,
-                summary_text="No sentiment data available"
-            )
-
-        # Get unique data sources
-        data_sources = list(set(state.get("data_sources", [])))
-
-        response = StockResponse(
+            sentiment_summary = _NO_SENTIMENT
+
+        # Every component is already a validated model or a value typed by
+        # its fetcher, so build the response without re-validating it
+        response = StockResponse.model_construct(
             symbol=symbol,
-            company_name=state.get("company_name", f"{symbol} Corporation"),
+            company_name=company_name if has_company else f"{symbol} Corporation",
             price=price,
             currency=currency,
             change=change,
             change_percent=change_percent,
             volume=volume,
-            financial_metrics=financial_metrics,
+            financial_metrics=financial_metrics if has_fundamentals else _EMPTY_METRICS,
             analyst_ratings=analyst_ratings,
             earnings_data=earnings_data,
             sentiment_items=sentiment_items,
             sentiment_summary=sentiment_summary,
-            data_sources=data_sources
+            # Data sources are already unique (tracked as a set)
+            data_sources=list(data_sources)
         )
 
         # Log processing summary
-        errors = state.get("processing_errors", [])
+        errors = state.processing_errors
         if errors:
             logger.warning(
                 f"Response generated with errors for {symbol}: {errors}")
@@ -706,59 +758,38 @@ graph = StateGraph(GraphState)
 
 
 @track_performance("orchestrating_agent")
-async def orchestrating_agent(state: dict) -> dict:
+async def orchestrating_agent(state: GraphState) -> GraphState:
     """Run all agents concurrently with proper state merging"""
-    symbol = state["symbol"]
+    symbol = state.symbol
 
     logger.debug(f"Starting orchestrating agent for {symbol}")
 
-    # Run all agents concurrently
-    tasks = [
-        price_agent(state),
-        fundamentals_agent(state),
-        analyst_agent(state),
-        sentiment_agent(state),
-        company_info_agent(state)
-    ]
-
-    # Wait for all tasks to complete
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Run all agents concurrently, each within its own time budget; the task
+    # group cancels anything still running if the orchestration is cancelled
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [
+            task_group.create_task(
+                run_agent_with_timeout(agent_name, agent_func, state))
+            for agent_name, agent_func in AGENTS
+        ]
 
-    # Start with the original state
-    final_state = state.copy()
+    # Start with a copy of the original state
+    final_state = replace(state)
 
-    logger.debug(f"Got {len(results)} results from agents")
+    logger.debug(f"Got {len(tasks)} results from agents")
 
     # Merge all results properly - only update if the value is NOT None
-    for i, result in enumerate(results):
-        if isinstance(result, dict):
-            logger.debug(f"Merging result {i}: keys = {list(result.keys())}")
-            # Deep merge the result into final_state
-            for key, value in result.items():
-                if key == "data_sources":
-                    # Merge data sources lists
-                    existing = final_state.get("data_sources", [])
-                    new_sources = value if isinstance(value, list) else []
-                    final_state["data_sources"] = list(
-                        set(existing + new_sources))
-                elif key == "processing_errors":
-                    # Merge error lists
-                    existing = final_state.get("processing_errors", [])
-                    new_errors = value if isinstance(value, list) else []
-                    final_state["processing_errors"] = existing + new_errors
-                elif value is not None:
-                    # Only update if the value is not None - preserve successful data
-                    final_state[key] = value
-                    logger.debug(f"Updated {key} with value: {type(value)}")
-        elif isinstance(result, Exception):
-            # Log error but continue
-            logger.error(f"Agent {i} failed with exception: {result}")
-            if "processing_errors" not in final_state:
-                final_state["processing_errors"] = []
-            final_state["processing_errors"].append(str(result))
-
-    logger.debug(f"Final state keys: {list(final_state.keys())}")
-    logger.debug(f"Final state price_data: {final_state.get('price_data')}")
+    for i, task in enumerate(tasks):
+        result = task.result()
+        logger.opt(lazy=True).debug(
+            "Merging result {}: keys = {}", lambda: i, lambda: list(result.keys()))
+        merge_agent_result(final_state, result)
+
+    # Lazy so the state isn't formatted unless DEBUG logging is enabled
+    logger.opt(lazy=True).debug(
+        "Final state agents completed: {}", lambda: sorted(final_state.agents_completed))
+    logger.opt(lazy=True).debug(
+        "Final state price_data: {}", lambda: final_state.price_data)
 
     return final_state
 
@@ -773,7 +804,8 @@ graph.add_edge("root", "orchestrate")
 graph.set_entry_point("root")
 graph.set_finish_point("orchestrate")
 
-# Compile the graph
+# Compile the graph once at import time (kept for callers that need the
+# LangGraph API; orchestrate() calls the nodes directly)
 compiled_graph = graph.compile()
 
 
@@ -785,8 +817,11 @@ async def orchestrate(req: StockRequest) -> StockResponse:
 
     try:
         with ErrorContext("orchestration", symbol):
-            # Run the multi-agent system
-            result = await compiled_graph.ainvoke({"symbol": symbol})
+            # Run the multi-agent system directly - the compiled graph is a
+            # fixed root -> orchestrate chain, so skip its per-node overhead
+            state = GraphState(symbol=validate_stock_symbol(symbol))
+            merge_agent_result(state, await root_node(state))
+            result = await orchestrating_agent(state)
 
             # Format and return the response
             response = format_response(symbol, result)
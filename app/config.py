@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from functools import lru_cache
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,22 @@ class Settings(BaseSettings):
     rate_limit_requests: int = Field(100, env='RATE_LIMIT_REQUESTS')
     rate_limit_window: int = Field(3600, env='RATE_LIMIT_WINDOW')
 
+    # Response cache TTLs per data type (seconds)
+    cache_ttl_price: int = Field(15, env='CACHE_TTL_PRICE')
+    cache_ttl_fundamentals: int = Field(21600, env='CACHE_TTL_FUNDAMENTALS')
+    cache_ttl_analyst: int = Field(3600, env='CACHE_TTL_ANALYST')
+    cache_ttl_earnings: int = Field(21600, env='CACHE_TTL_EARNINGS')
+    cache_ttl_sentiment: int = Field(300, env='CACHE_TTL_SENTIMENT')
+    cache_ttl_company: int = Field(2592000, env='CACHE_TTL_COMPANY')
+    cache_ttl_rss_feed: int = Field(300, env='CACHE_TTL_RSS_FEED')
+
+    # Directory for persisting long-lived cache entries across restarts
+    # (disabled when empty)
+    cache_dir: str = Field("", env='CACHE_DIR')
+
+    # Comma-separated symbols whose caches are primed at startup
+    warmup_symbols: str = Field("", env='WARMUP_SYMBOLS')
+
     # Monitoring
     enable_metrics: bool = Field(True, env='ENABLE_METRICS')
     metrics_port: int = Field(9090, env='METRICS_PORT')
@@ -30,6 +47,9 @@ class Settings(BaseSettings):
     use_openai_sentiment: bool = Field(True, env='USE_OPENAI_SENTIMENT')
     openai_model: str = Field("gpt-4.1-nano-2025-04-14", env='OPENAI_MODEL')
     sentiment_temperature: float = Field(0.1, env='SENTIMENT_TEMPERATURE')
+    # Articles whose VADER score is at least this strong (in the same
+    # direction as the rule-based score) are not sent to OpenAI
+    openai_confidence_gate: float = Field(0.3, env='OPENAI_CONFIDENCE_GATE')
 
     # News settings
     news_days_back: int = Field(7, env='NEWS_DAYS_BACK')
@@ -42,4 +62,10 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsed from the environment once"""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,16 +1,29 @@
+import asyncio
 import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
+from functools import lru_cache
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel
 from loguru import logger
-import json
+import orjson
 from app.schemas import StockRequest
 from app.agents import stream_coordinated_analysis
+from app.services.http_client import get_http_client, close_http_client
+from app.services.market_data import prime_symbol_cache
 from app.utils.monitoring import metrics
 from app.utils.error_handling import StockDataError, InvalidSymbolError, APITimeoutError
-from app.config import settings
+from app.config import Settings, get_settings, settings
+
+# SSE framing, plus the fixed frames, encoded once
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+_STOPPED_FRAME = _SSE_PREFIX + orjson.dumps(
+    {'status': 'cancelled', 'message': 'Analysis stopped by user'}) + _SSE_SUFFIX
+_INTERNAL_ERROR_FRAME = _SSE_PREFIX + orjson.dumps(
+    {"error": "internal_error", "message": "An error occurred during analysis"}) + _SSE_SUFFIX
 
 
 class HealthResponse(BaseModel):
@@ -27,24 +40,51 @@ async def lifespan(app: FastAPI):
 
     # Start metrics server
     metrics.start_metrics_server()
+    metrics_flusher = asyncio.create_task(metrics.run_request_metrics_flusher())
 
-    # Configure logging
-    logger.add(
+    # Configure logging - enqueue so file writes happen on loguru's worker
+    # thread instead of blocking the event loop mid-stream
+    log_sink_id = logger.add(
         "logs/api.log",
         rotation="100 MB",
         retention="30 days",
         level="INFO",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
 
+    # Open the shared HTTP client now rather than on the first request
+    get_http_client()
+
+    # Prime caches for the configured watchlist in the background so startup
+    # isn't held up by slow or rate-limited providers
+    warmup_task = None
+    warmup_symbols = [symbol.strip().upper()
+                      for symbol in settings.warmup_symbols.split(",") if symbol.strip()]
+    if warmup_symbols:
+        warmup_task = asyncio.create_task(prime_symbol_cache(warmup_symbols))
+
     logger.info("API startup complete")
 
     yield
 
     # Shutdown
     logger.info("Shutting down API")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await close_http_client()
+    metrics_flusher.cancel()
+    try:
+        await metrics_flusher
+    except asyncio.CancelledError:
+        pass
     logger.info("API shutdown complete")
 
+    # Flush queued records and stop the sink's worker thread
+    logger.remove(log_sink_id)
+
 
 app = FastAPI(
     title="Multi-Agent Stock Screening Bot",
@@ -53,64 +93,84 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Requests without an Origin header (health checks, server-side clients like
+# the Streamlit frontend) pass straight through CORSMiddleware untouched
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=[origin.strip() for origin in settings.cors_origins.split(",")],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 
-async def track_request_metrics(request: Request, response_time: float, status_code: int):
+def record_request_metrics(endpoint: str, start_ns: int, status_code: int):
     """Track request metrics"""
-    endpoint = request.url.path
     status = "success" if status_code < 400 else "error"
-    metrics.record_request(endpoint, status, response_time)
+    metrics.record_request(
+        endpoint, status, (time.perf_counter_ns() - start_ns) / 1e9)
 
 
-@app.middleware("http")
-async def request_timing_middleware(request: Request, call_next):
-    """Middleware to track request timing and metrics"""
-    start_time = time.time()
+class RequestTimingMiddleware:
+    """ASGI middleware tracking request timing and metrics
 
-    try:
-        # Process request
-        response = await call_next(request)
+    Times each request up to its response headers, like the call_next
+    middleware it replaces, without the extra task and coroutine per request.
+    """
 
-        # Track metrics
-        response_time = time.time() - start_time
-        await track_request_metrics(request, response_time, response.status_code)
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    except HTTPException as e:
-        # Track failed requests
-        response_time = time.time() - start_time
-        await track_request_metrics(request, response_time, e.status_code)
-        raise
-    except Exception as e:
-        # Track unexpected errors
-        response_time = time.time() - start_time
-        await track_request_metrics(request, response_time, 500)
-        raise
+        start_ns = time.perf_counter_ns()
+        endpoint = scope["path"]
+        recorded = False
 
+        async def send_with_metrics(message: Message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                record_request_metrics(endpoint, start_ns, message["status"])
+            await send(message)
 
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            # Track unexpected errors
+            if not recorded:
+                record_request_metrics(endpoint, start_ns, 500)
+            raise
+
+
+app.add_middleware(RequestTimingMiddleware)
+
+
+@lru_cache(maxsize=2)
+def health_payload(metrics_enabled: bool) -> bytes:
+    """Health check body, encoded once per metrics setting"""
     services = {
-        "metrics": "enabled" if settings.enable_metrics else "disabled"
+        "metrics": "enabled" if metrics_enabled else "disabled"
     }
 
     return HealthResponse(
         status="healthy",
         services=services
-    )
+    ).model_dump_json().encode()
+
+
+@app.get("/health", responses={200: {"model": HealthResponse}})
+async def health_check(settings: Settings = Depends(get_settings)):
+    """Health check endpoint"""
+    return Response(content=health_payload(settings.enable_metrics),
+                    media_type="application/json")
 
 
 @app.post("/analyze-stream", summary="Get real-time stock analysis updates via SSE")
-async def analyze_stock_stream(req: StockRequest, request: Request):
+async def analyze_stock_stream(req: StockRequest):
     """Get real-time stock analysis updates via Server-Sent Events with coordinating agent validation
     - Real-time price data
     - Financial metrics and ratios
@@ -119,46 +179,43 @@ async def analyze_stock_stream(req: StockRequest, request: Request):
     """
 
     async def event_generator():
+        symbol = req.symbol.upper()
         try:
-            symbol = req.symbol.upper()
-
             # Track the symbol query
             metrics.record_symbol_query(symbol)
 
             async for update in stream_coordinated_analysis(symbol):
-                # Check if client disconnected
-                if await request.is_disconnected():
-                    logger.info(
-                        f"🛑 Client disconnected during analysis for {symbol} - stopping analysis")
-                    # Send a cancellation message to indicate clean stop
-                    yield f"data: {json.dumps({'status': 'cancelled', 'message': 'Analysis stopped - client disconnected'})}\n\n"
-                    break
-
-                yield f"data: {json.dumps(update)}\n\n"
+                # One exact-size allocation per frame (a + b + c copies the
+                # payload twice)
+                yield b"".join((_SSE_PREFIX, update, _SSE_SUFFIX))
 
+        except asyncio.CancelledError:
+            # StreamingResponse listens for the client going away and cancels
+            # the stream, so nothing here has to poll for it
+            logger.info(
+                f"🛑 Client disconnected during analysis for {symbol} - stopping analysis")
+            raise
         except InvalidSymbolError as e:
             error_data = {"status": "error",
                           "error": "invalid_symbol", "message": str(e)}
-            yield f"data: {json.dumps(error_data)}\n\n"
+            yield _SSE_PREFIX + orjson.dumps(error_data) + _SSE_SUFFIX
         except ConnectionError as e:
             # Handle connection errors gracefully (often client disconnection)
             logger.info(
                 f"🔌 Connection terminated for {req.symbol} (likely user stopped): {e}")
-            yield f"data: {json.dumps({'status': 'cancelled', 'message': 'Analysis stopped by user'})}\n\n"
+            yield _STOPPED_FRAME
         except Exception as e:
             # Only log as error if it's not a client disconnection
             if "client disconnected" not in str(e).lower() and "connection" not in str(e).lower():
                 logger.error(f"Streaming error for {req.symbol}: {e}")
-                error_data = {"error": "internal_error",
-                              "message": "An error occurred during analysis"}
-                yield f"data: {json.dumps(error_data)}\n\n"
+                yield _INTERNAL_ERROR_FRAME
             else:
                 logger.info(
                     f"🛑 Analysis for {req.symbol} stopped by client disconnection")
 
     return StreamingResponse(
         event_generator(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
@@ -168,7 +225,7 @@ async def analyze_stock_stream(req: StockRequest, request: Request):
 
 
 @app.get("/metrics", summary="API metrics (if enabled)")
-async def get_metrics():
+async def get_metrics(settings: Settings = Depends(get_settings)):
     """Get API metrics (if metrics are enabled)"""
     if not settings.enable_metrics:
         raise HTTPException(status_code=404, detail="Metrics disabled")
@@ -176,30 +233,42 @@ async def get_metrics():
     return {"message": f"Metrics available at http://localhost:{settings.metrics_port}/metrics"}
 
 
-@app.exception_handler(StockDataError)
-async def stock_data_exception_handler(request: Request, exc: StockDataError):
-    return JSONResponse(
-        status_code=502,
-        content={"error": "stock_data_error", "detail": str(exc)}
-    )
-
-
-@app.exception_handler(InvalidSymbolError)
-async def invalid_symbol_exception_handler(request: Request, exc: InvalidSymbolError):
-    return JSONResponse(
-        status_code=400,
-        content={"error": "invalid_symbol", "detail": str(exc)}
-    )
+# Status code and error tag per API exception; subclasses without an entry
+# (e.g. DataNotFoundError) resolve through their MRO to StockDataError
+_EXCEPTION_RESPONSES = {
+    InvalidSymbolError: (400, "invalid_symbol"),
+    APITimeoutError: (504, "timeout"),
+    StockDataError: (502, "stock_data_error"),
+}
 
 
-@app.exception_handler(APITimeoutError)
-async def timeout_exception_handler(request: Request, exc: APITimeoutError):
+@app.exception_handler(StockDataError)
+async def stock_data_exception_handler(request: Request, exc: StockDataError):
+    status_code, error = next(
+        _EXCEPTION_RESPONSES[cls] for cls in type(exc).__mro__ if cls in _EXCEPTION_RESPONSES)
     return JSONResponse(
-        status_code=504,
-        content={"error": "timeout", "detail": str(exc)}
+        status_code=status_code,
+        content={"error": error, "detail": str(exc)}
     )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+
+    # uvloop isn't available on Windows; fall back to the default asyncio loop
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=8000,
+        loop=loop,
+        http="httptools",
+        backlog=4096,
+        timeout_keep_alive=30,
+        limit_concurrency=1024
+    )
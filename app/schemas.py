@@ -1,15 +1,18 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from enum import Enum
+from enum import StrEnum
+from functools import cached_property
 
 
 class StockRequest(BaseModel):
+    # pydantic-core compiles this pattern once with its native regex engine,
+    # which is faster than a Python field_validator and keeps it in the schema
     symbol: str = Field(..., pattern=r"^[A-Z]{1,5}$",
                         description="NASDAQ stock symbol")
 
 
-class SentimentScore(str, Enum):
+class SentimentScore(StrEnum):
     VERY_POSITIVE = "very_positive"
     POSITIVE = "positive"
     NEUTRAL = "neutral"
@@ -18,6 +21,9 @@ class SentimentScore(str, Enum):
 
 
 class SentimentItem(BaseModel):
+    # Immutable so cached instances shared across requests can't be modified
+    model_config = ConfigDict(frozen=True)
+
     source: str
     title: str
     polarity: float = Field(..., ge=-1, le=1,
@@ -28,6 +34,9 @@ class SentimentItem(BaseModel):
 
 
 class AnalystRating(BaseModel):
+    # Immutable so cached instances shared across requests can't be modified
+    model_config = ConfigDict(frozen=True)
+
     firm: str
     rating: str
     price_target: Optional[float] = None
@@ -35,6 +44,9 @@ class AnalystRating(BaseModel):
 
 
 class EarningsData(BaseModel):
+    # Immutable so cached instances shared across requests can't be modified
+    model_config = ConfigDict(frozen=True)
+
     eps_estimate: Optional[float] = None
     eps_actual: Optional[float] = None
     revenue_estimate: Optional[float] = None
@@ -44,6 +56,9 @@ class EarningsData(BaseModel):
 
 
 class FinancialMetrics(BaseModel):
+    # Immutable so shared fallback instances can't be modified
+    model_config = ConfigDict(frozen=True)
+
     market_cap: Optional[float] = None
     pe_ratio: Optional[float] = None
     peg_ratio: Optional[float] = None
@@ -65,6 +80,9 @@ class FinancialMetrics(BaseModel):
 
 
 class SentimentSummary(BaseModel):
+    # Immutable so shared fallback instances can't be modified
+    model_config = ConfigDict(frozen=True)
+
     overall_score: SentimentScore
     confidence: float = Field(..., ge=0, le=1)
     positive_count: int
@@ -103,9 +121,9 @@ class StockResponse(BaseModel):
     data_sources: List[str] = []
 
     # For backwards compatibility
-    @property
+    @cached_property
     def sentiment(self) -> List[Dict[str, Any]]:
-        """Backwards compatibility with old sentiment format"""
+        """Backwards compatibility with old sentiment format (built once)"""
         return [
             {
                 "source": item.source,
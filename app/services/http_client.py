@@ -0,0 +1,73 @@
+import asyncio
+from typing import Optional
+import httpx
+from curl_cffi.requests import AsyncSession
+from loguru import logger
+
+from app.config import settings
+
+# Shared outbound client so concurrent agents reuse pooled TCP/TLS connections
+# (multiplexed over HTTP/2 where the server supports it)
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Yahoo Finance throttles clients that don't look like a browser, so its
+# endpoints go through a curl_cffi session presenting Chrome's TLS fingerprint
+_yahoo_session: Optional[AsyncSession] = None
+_yahoo_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use"""
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them, so start a new
+    # client if we are now running on a different loop (e.g. in tests)
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=True,
+            # Fail fast on unreachable hosts; reads get the full budget
+            timeout=httpx.Timeout(settings.http_timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=100,
+                                max_keepalive_connections=50,
+                                keepalive_expiry=30)
+        )
+        _client_loop = loop
+        logger.debug("Created shared HTTP client")
+
+    return _client
+
+
+def get_yahoo_session() -> AsyncSession:
+    """Return the shared browser-impersonating session for Yahoo Finance"""
+    global _yahoo_session, _yahoo_session_loop
+
+    loop = asyncio.get_running_loop()
+    if _yahoo_session is None or _yahoo_session_loop is not loop:
+        _yahoo_session = AsyncSession(impersonate="chrome",
+                                      timeout=settings.http_timeout)
+        _yahoo_session_loop = loop
+        logger.debug("Created shared Yahoo Finance session")
+
+    return _yahoo_session
+
+
+async def close_http_client():
+    """Close the shared clients (called on application shutdown)"""
+    global _client, _client_loop, _yahoo_session, _yahoo_session_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.debug("Closed shared HTTP client")
+
+    # The session's timers live on the loop that created it; one left over
+    # from an earlier (closed) loop is simply dropped
+    if _yahoo_session is not None and _yahoo_session_loop is asyncio.get_running_loop():
+        await _yahoo_session.close()
+        logger.debug("Closed shared Yahoo Finance session")
+
+    _client = None
+    _client_loop = None
+    _yahoo_session = None
+    _yahoo_session_loop = None
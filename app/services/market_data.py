@@ -1,9 +1,13 @@
-import httpx
 import yfinance as yf
 import finnhub
 import pandas as pd
+import numpy as np
 import asyncio
-import re
+import string
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from loguru import logger
@@ -13,11 +17,18 @@ from app.utils.error_handling import (
     handle_api_errors,
     create_retry_decorator,
     fallback_manager,
+    CircuitBreaker,
+    ErrorKind,
+    classify_exception,
+    is_provider_fault,
     DataNotFoundError,
     InvalidSymbolError,
     APIRateLimitError
 )
 from app.utils.monitoring import track_performance
+from app.utils.caching import async_ttl_cache
+from app.utils.rate_limit import TokenBucket
+from app.services.http_client import get_http_client, get_yahoo_session
 from app.schemas import FinancialMetrics, AnalystRating, EarningsData
 
 # Initialize clients
@@ -25,21 +36,79 @@ finnhub_client = finnhub.Client(
     api_key=settings.finnhub_key) if settings.finnhub_key else None
 
 ALPHA_URL = "https://www.alphavantage.co/query"
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
 
+# yfinance and finnhub are synchronous; their network calls run on this
+# bounded pool so they never block the event loop
+_BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="market-data")
 
-def validate_stock_symbol(symbol: str) -> bool:
+
+# Per-provider request budgets. Calls go through immediately while quota is
+# available and only wait as long as needed under bursts.
+_YF_BUCKET = TokenBucket(rate=2.0, capacity=4)
+_ALPHA_BUCKET = TokenBucket(rate=5 / 60, capacity=5)  # free tier: 5 per minute
+_FINNHUB_BUCKET = TokenBucket(rate=30 / 60, capacity=30)
+
+# Seconds to wait on Alpha Vantage before also asking Yahoo Finance for a price
+PRICE_HEDGE_AFTER = 0.8
+
+# While a provider keeps failing (Finnhub 403s, Yahoo blocking or 429s),
+# skip it and return empty results instead of waiting out timeouts and retries
+_FINNHUB_CB = CircuitBreaker(threshold=5, cooldown=60)
+_YF_CB = CircuitBreaker(threshold=5, cooldown=60)
+
+
+async def _run_blocking(fn, *args):
+    """Run a blocking call on the market data thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_BLOCKING_EXECUTOR, fn, *args)
+
+
+# Ticker objects memoize what they download (info, statements), so sharing one
+# per symbol lets e.g. the company name lookup reuse the info fetched for
+# fundamentals. The time bucket in the key retires them after _TICKER_TTL
+# seconds so that data never outlives the result caches it feeds.
+_TICKER_TTL = 300
+
+
+@lru_cache(maxsize=512)
+def _cached_ticker(symbol: str, _bucket: int) -> yf.Ticker:
+    return yf.Ticker(symbol)
+
+
+def _get_ticker(symbol: str) -> yf.Ticker:
+    """Shared yfinance Ticker for a symbol (replaced every _TICKER_TTL seconds)"""
+    return _cached_ticker(symbol, int(time.monotonic() // _TICKER_TTL))
+
+
+# Characters allowed in a symbol, as a str.translate deletion table
+_SYMBOL_DELETE_TABLE = str.maketrans("", "", string.ascii_uppercase + ".")
+
+
+class ValidatedSymbol(str):
+    """A symbol that already passed validate_stock_symbol (normalized)"""
+    __slots__ = ()
+
+
+def validate_stock_symbol(symbol: str) -> ValidatedSymbol:
     """
     Validate stock symbol format before making API calls.
 
+    Symbols that were already validated are returned as is, so entry points
+    validate once and pass the result down without re-checking it.
+
     Args:
         symbol: Stock symbol to validate
 
     Returns:
-        True if symbol format is valid, False otherwise
+        The stripped, uppercased symbol as a ValidatedSymbol
 
     Raises:
         InvalidSymbolError: If symbol format is invalid
     """
+    if isinstance(symbol, ValidatedSymbol):
+        return symbol
+
     if not symbol or not isinstance(symbol, str):
         raise InvalidSymbolError("Symbol must be a non-empty string")
 
@@ -51,13 +120,14 @@ def validate_stock_symbol(symbol: str) -> bool:
         raise InvalidSymbolError(
             f"Invalid symbol '{symbol}': Stock symbols must be 1-5 characters long")
 
-    # Check for valid characters (letters and dots only)
-    if not re.match(r'^[A-Z\.]+$', symbol):
+    # Check for valid characters (letters and dots only) - deleting every
+    # allowed character leaves nothing behind for a valid symbol
+    if symbol.translate(_SYMBOL_DELETE_TABLE):
         raise InvalidSymbolError(
             f"Invalid symbol '{symbol}': Stock symbols can only contain letters and dots")
 
     # Additional checks for obviously invalid patterns
-    if symbol.startswith('.') or symbol.endswith('.'):
+    if symbol[0] == '.' or symbol[-1] == '.':
         raise InvalidSymbolError(
             f"Invalid symbol '{symbol}': Cannot start or end with a dot")
 
@@ -65,7 +135,7 @@ def validate_stock_symbol(symbol: str) -> bool:
         raise InvalidSymbolError(
             f"Invalid symbol '{symbol}': Cannot contain consecutive dots")
 
-    return True
+    return ValidatedSymbol(symbol)
 
 
 @handle_api_errors
@@ -77,221 +147,317 @@ async def fetch_price_alpha(symbol: str) -> Dict[str, Any]:
     if not settings.alpha_vantage_key:
         raise DataNotFoundError("Alpha Vantage API key not configured")
 
-    async with httpx.AsyncClient(timeout=settings.http_timeout) as client:
-        response = await client.get(
-            ALPHA_URL,
-            params={
-                "function": "GLOBAL_QUOTE",
-                "symbol": symbol,
-                "apikey": settings.alpha_vantage_key
-            }
-        )
-        response.raise_for_status()
-        data = response.json()
+    await _ALPHA_BUCKET.acquire()
+    client = get_http_client()
+    response = await client.get(
+        ALPHA_URL,
+        params={
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol,
+            "apikey": settings.alpha_vantage_key
+        }
+    )
+    response.raise_for_status()
+    body = response.content
 
-        # Better error handling for Alpha Vantage responses
-        if "Error Message" in data:
-            raise InvalidSymbolError(f"Invalid symbol: {symbol}")
+    # Error and rate-limit replies are recognizable from their top-level keys,
+    # so reject them with a substring check before parsing the body
+    if b'"Error Message"' in body:
+        raise InvalidSymbolError(f"Invalid symbol: {symbol}")
 
-        if "Information" in data:
-            # API call frequency limit reached
-            raise APIRateLimitError("Alpha Vantage API rate limit exceeded")
+    if b'"Information"' in body or b'"Note"' in body:
+        # API call frequency limit reached (either format)
+        raise APIRateLimitError("Alpha Vantage API rate limit exceeded")
 
-        if "Note" in data:
-            # API call frequency limit reached (different format)
-            raise APIRateLimitError("Alpha Vantage API rate limit exceeded")
+    data = orjson.loads(body)
 
-        if "Global Quote" not in data or not data["Global Quote"]:
-            raise DataNotFoundError(f"No price data found for {symbol}")
+    if "Global Quote" not in data or not data["Global Quote"]:
+        raise DataNotFoundError(f"No price data found for {symbol}")
 
-        quote = data["Global Quote"]
+    quote = data["Global Quote"]
 
-        # Check if quote has valid data
-        if not quote or "05. price" not in quote:
-            raise DataNotFoundError(f"Invalid price data format for {symbol}")
+    # Check if quote has valid data
+    if not quote or "05. price" not in quote:
+        raise DataNotFoundError(f"Invalid price data format for {symbol}")
 
-        result = {
-            "price": float(quote["05. price"]),
-            "change": float(quote["09. change"]),
-            "change_percent": float(quote["10. change percent"].replace("%", "")),
-            "volume": int(quote["06. volume"]),
-            "currency": "USD",
-            "source": "alpha_vantage"
-        }
+    result = {
+        "price": float(quote["05. price"]),
+        "change": float(quote["09. change"]),
+        "change_percent": float(quote["10. change percent"].replace("%", "")),
+        "volume": int(quote["06. volume"]),
+        "currency": "USD",
+        "source": "alpha_vantage"
+    }
 
-        return result
+    return result
 
 
 @handle_api_errors
 @create_retry_decorator()
 @track_performance("source_yfinance_price")
 async def fetch_price_yfinance(symbol: str) -> Dict[str, Any]:
-    """Fetch price from Yahoo Finance with multi-index column support"""
-    # Add delay to avoid rate limiting
-    await asyncio.sleep(1.0)
+    """Fetch price from Yahoo Finance's chart endpoint
+
+    Calls the endpoint directly on the shared browser-impersonating session
+    rather than through yfinance's synchronous history().
+    """
+    # Wait for Yahoo Finance quota to avoid rate limiting
+    await _YF_BUCKET.acquire()
 
     try:
-        ticker = yf.Ticker(symbol)
         # Use 2 days to ensure we have recent data
-        hist = ticker.history(period="2d", timeout=15)
-
-        # Handle multi-index columns (standard in latest yfinance)
-        if hasattr(hist, 'columns') and isinstance(hist.columns, pd.MultiIndex):
-            # Flatten multi-index columns
-            hist.columns = hist.columns.droplevel(1)
+        response = await get_yahoo_session().get(
+            YAHOO_CHART_URL.format(symbol=symbol),
+            params={"range": "2d", "interval": "1d"}
+        )
+        if response.status_code == 429:
+            raise APIRateLimitError("Yahoo Finance rate limit exceeded: 429 Too Many Requests")
+        response.raise_for_status()
 
-        if hist.empty:
+        chart = orjson.loads(response.content).get("chart") or {}
+        results = chart.get("result")
+        if chart.get("error") or not results:
             raise DataNotFoundError(f"No price data found for {symbol}")
 
-        latest = hist.iloc[-1]
+        quote = results[0]["indicators"]["quote"][0]
+        hist = pd.DataFrame({
+            "Open": quote.get("open"),
+            "Close": quote.get("close"),
+            "Volume": quote.get("volume")
+        }, dtype=float).dropna(subset=["Close"]).fillna({"Volume": 0})
 
-        # Calculate change from previous day if available
-        if len(hist) > 1:
-            previous = hist.iloc[-2]
-            change = float(latest["Close"] - previous["Close"])
-            change_percent = float(
-                (latest["Close"] - previous["Close"]) / previous["Close"] * 100)
-        else:
-            # Fallback to intraday change
-            change = float(latest["Close"] - latest["Open"])
-            change_percent = float(
-                (latest["Close"] - latest["Open"]) / latest["Open"] * 100)
-
-        result = {
-            "price": float(latest["Close"]),
-            "change": change,
-            "change_percent": change_percent,
-            "volume": int(latest["Volume"]),
-            "currency": "USD",  # Default to USD to avoid extra API call
-            "source": "yfinance"
-        }
+        return _price_from_history(symbol, hist)
 
-        return result
+    except Exception as e:
+        if classify_exception(e) is ErrorKind.RATE_LIMIT:
+            raise APIRateLimitError(f"Yahoo Finance rate limit exceeded: {e}")
+        raise
+
+
+def _price_from_history(symbol: str, hist: pd.DataFrame) -> Dict[str, Any]:
+    """Build a price result from a symbol's recent daily history"""
+    if hist.empty:
+        raise DataNotFoundError(f"No price data found for {symbol}")
+
+    latest = hist.iloc[-1]
+
+    # Calculate change from previous day if available
+    if len(hist) > 1:
+        previous = hist.iloc[-2]
+        change = float(latest["Close"] - previous["Close"])
+        change_percent = float(
+            (latest["Close"] - previous["Close"]) / previous["Close"] * 100)
+    else:
+        # Fallback to intraday change
+        change = float(latest["Close"] - latest["Open"])
+        change_percent = float(
+            (latest["Close"] - latest["Open"]) / latest["Open"] * 100)
+
+    return {
+        "price": float(latest["Close"]),
+        "change": change,
+        "change_percent": change_percent,
+        "volume": int(latest["Volume"]),
+        "currency": "USD",  # Default to USD to avoid extra API call
+        "source": "yfinance"
+    }
 
+
+@handle_api_errors
+@create_retry_decorator()
+@track_performance("source_yfinance_price_batch")
+async def fetch_prices_yfinance_batch(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch prices for several symbols from Yahoo Finance in one download.
+
+    Symbols Yahoo returns no data for are left out of the result.
+    """
+    await _YF_BUCKET.acquire()
+
+    try:
+        df = await _run_blocking(lambda: yf.download(
+            " ".join(symbols), period="2d", group_by="ticker",
+            progress=False, threads=True, timeout=30))
     except Exception as e:
-        if "429" in str(e) or "Too Many Requests" in str(e):
+        if classify_exception(e) is ErrorKind.RATE_LIMIT:
             raise APIRateLimitError(f"Yahoo Finance rate limit exceeded: {e}")
         raise
 
+    results = {}
+    if df is None or df.empty:
+        return results
+
+    for symbol in symbols:
+        if symbol not in df.columns.get_level_values(0):
+            continue
+        # Symbols that failed to download come back as all-NaN rows
+        hist = df[symbol].dropna(how="all")
+        try:
+            results[symbol] = _price_from_history(symbol, hist)
+        except (DataNotFoundError, ValueError) as e:
+            logger.debug(f"No batch price for {symbol}: {e}")
+    return results
+
 
 async def fetch_price_with_fallback(symbol: str) -> Dict[str, Any]:
-    """Fetch price with fallback chain (Alpha Vantage → Yahoo Finance)"""
-    return await fallback_manager.execute_with_fallback(
+    """Fetch price with fallback chain (Alpha Vantage → Yahoo Finance)
+
+    Yahoo Finance is started early if Alpha Vantage is slow to answer, so a
+    lagging primary doesn't hold up the quote.
+    """
+    if not _ALPHA_BUCKET.available():
+        # Alpha Vantage's quota is spent; queueing for it would only use up
+        # the hedge delay, so go straight to Yahoo Finance and leave the
+        # quota to refill
+        return await fallback_manager.execute_with_fallback(
+            "price", symbol, fetch_price_yfinance, [])
+
+    return await fallback_manager.execute_hedged(
         "price",
         symbol,
         fetch_price_alpha,
-        [fetch_price_yfinance]
+        [fetch_price_yfinance],
+        hedge_after=PRICE_HEDGE_AFTER
     )
 
 
+def _fetch_52_week_range(ticker: yf.Ticker) -> Dict[str, float]:
+    """52-week high/low from a year of price history (blocking)"""
+    # Use shorter period to reduce load
+    hist = ticker.history(period="1y", timeout=30,
+                          auto_adjust=True, prepost=False)
+
+    # Handle both old and new yfinance multi-index format
+    if hasattr(hist, 'columns') and isinstance(hist.columns, pd.MultiIndex):
+        # Flatten multi-index columns (new yfinance format)
+        hist.columns = hist.columns.droplevel(1)
+
+    if hist.empty:
+        return {}
+
+    # Reduce the two columns we need as plain arrays (NaN-aware, like
+    # pandas) rather than through the DataFrame
+    return {
+        "fifty_two_week_high": float(np.nanmax(hist["High"].to_numpy())),
+        "fifty_two_week_low": float(np.nanmin(hist["Low"].to_numpy()))
+    }
+
+
+def _fetch_info_metrics(ticker: yf.Ticker) -> Dict[str, Any]:
+    """Key metrics from ticker.info (blocking)"""
+    # Single attempt with basic info - let yfinance handle retries internally
+    info = ticker.info
+
+    if not (info and isinstance(info, dict) and len(info) > 5):
+        return {}
+
+    # Extract key metrics available in most responses
+    return {
+        "market_cap": info.get("marketCap"),
+        "pe_ratio": info.get("trailingPE") or info.get("forwardPE"),
+        "price_to_book": info.get("priceToBook"),
+        "dividend_yield": info.get("dividendYield"),
+        "beta": info.get("beta"),
+        "revenue_ttm": info.get("totalRevenue"),
+        "profit_margin": info.get("profitMargins")
+    }
+
+
+def _fetch_fast_info_metrics(ticker: yf.Ticker) -> Dict[str, Any]:
+    """Basic metrics from the lightweight fast_info endpoint (blocking)"""
+    fast_info = ticker.fast_info
+    metrics = {}
+
+    if fast_info:
+        try:
+            if hasattr(fast_info, 'market_cap') and fast_info.market_cap:
+                metrics['market_cap'] = fast_info.market_cap
+            if hasattr(fast_info, 'shares') and fast_info.shares:
+                metrics['shares_outstanding'] = fast_info.shares
+        except Exception:
+            logger.debug(
+                f"Could not extract fast_info data for {ticker.ticker}")
+
+    return metrics
+
+
 @handle_api_errors
 @create_retry_decorator()
 @track_performance("source_yfinance_fundamentals")
 async def fetch_fundamentals_yf(symbol: str) -> FinancialMetrics:
     """Fetch comprehensive fundamental data compatible with latest yfinance"""
-    # Delay to avoid rate limiting
-    await asyncio.sleep(3.0)
+    if _YF_CB.is_open():
+        logger.debug(f"Yahoo Finance circuit open - skipping fundamentals for {symbol}")
+        return FinancialMetrics()
+
+    # Wait for Yahoo Finance quota to avoid rate limiting
+    await _YF_BUCKET.acquire()
 
     try:
         logger.debug(
             f"Starting fundamentals fetch for {symbol} with latest yfinance")
 
         # Let yfinance handle session management (required for latest versions)
-        ticker = yf.Ticker(symbol)
+        ticker = _get_ticker(symbol)
+
+        # Strategies 1 and 2 (historical range and basic info) are independent
+        # blocking calls, so run them side by side off the event loop
+        logger.debug(f"Getting 52-week range and basic info for {symbol}")
+        hist_result, info_result = await asyncio.gather(
+            _run_blocking(_fetch_52_week_range, ticker),
+            _run_blocking(_fetch_info_metrics, ticker),
+            return_exceptions=True
+        )
 
-        # Strategy 1: Try historical data first (most reliable)
+        # Strategy 1: historical data (most reliable)
         hist_data = {}
-        try:
-            logger.debug(f"Getting 52-week range for {symbol}")
-            # Use shorter period to reduce load
-            hist = ticker.history(period="1y", timeout=30,
-                                  auto_adjust=True, prepost=False)
-
-            # Handle both old and new yfinance multi-index format
-            if hasattr(hist, 'columns') and isinstance(hist.columns, pd.MultiIndex):
-                # Flatten multi-index columns (new yfinance format)
-                hist.columns = hist.columns.droplevel(1)
-
-            if not hist.empty:
-                hist_data = {
-                    "fifty_two_week_high": float(hist["High"].max()),
-                    "fifty_two_week_low": float(hist["Low"].min())
-                }
-                logger.info(
-                    f"Historical data success for {symbol}: 52w range ${hist_data['fifty_two_week_low']:.2f}-${hist_data['fifty_two_week_high']:.2f}")
-            else:
-                logger.debug(f"Empty historical data for {symbol}")
-        except Exception as e:
-            if "429" in str(e) or "rate limit" in str(e).lower():
+        if isinstance(hist_result, Exception):
+            if classify_exception(hist_result) is ErrorKind.RATE_LIMIT:
                 logger.warning(
-                    f"Rate limited on historical data for {symbol}: {e}")
-                # Longer backoff for rate limits
-                await asyncio.sleep(10.0)
+                    f"Rate limited on historical data for {symbol}: {hist_result}")
             else:
                 logger.debug(
-                    f"Failed to get historical data for {symbol}: {e}")
+                    f"Failed to get historical data for {symbol}: {hist_result}")
+        elif hist_result:
+            hist_data = hist_result
+            logger.info(
+                f"Historical data success for {symbol}: 52w range ${hist_data['fifty_two_week_low']:.2f}-${hist_data['fifty_two_week_high']:.2f}")
+        else:
+            logger.debug(f"Empty historical data for {symbol}")
 
-        # Strategy 2: Try basic info (simplified approach for latest yfinance)
+        # Strategy 2: basic info (simplified approach for latest yfinance)
         info_data = {}
-        try:
-            logger.debug(f"Attempting basic info for {symbol}")
-
-            # Single attempt with basic info - let yfinance handle retries internally
-            info = ticker.info
-
-            if info and isinstance(info, dict) and len(info) > 5:
-                # Extract key metrics available in most responses
-                info_data = {
-                    "market_cap": info.get("marketCap"),
-                    "pe_ratio": info.get("trailingPE") or info.get("forwardPE"),
-                    "price_to_book": info.get("priceToBook"),
-                    "dividend_yield": info.get("dividendYield"),
-                    "beta": info.get("beta"),
-                    "revenue_ttm": info.get("totalRevenue"),
-                    "profit_margin": info.get("profitMargins")
-                }
-
-                # Count valid metrics
-                valid_count = sum(
-                    1 for v in info_data.values() if v is not None)
-                if valid_count > 0:
-                    logger.info(
-                        f"Info success for {symbol}: {valid_count} metrics")
-                else:
-                    logger.debug(f"No valid metrics in info for {symbol}")
-            else:
-                logger.debug(f"Limited info response for {symbol}")
-
-        except Exception as e:
-            error_msg = str(e)
-            if "429" in error_msg or "Too Many Requests" in error_msg:
+        if isinstance(info_result, Exception):
+            kind = classify_exception(info_result)
+            if kind is ErrorKind.RATE_LIMIT:
                 logger.warning(f"Rate limited getting info for {symbol}")
-            elif "curl_cffi" in error_msg:
+            elif kind is ErrorKind.SESSION:
                 logger.debug(
                     f"Session error for {symbol} - using yfinance defaults")
             else:
-                logger.debug(f"Info error for {symbol}: {error_msg}")
+                logger.debug(f"Info error for {symbol}: {info_result}")
+        elif info_result:
+            info_data = info_result
+
+            # Count valid metrics
+            valid_count = sum(
+                1 for v in info_data.values() if v is not None)
+            if valid_count > 0:
+                logger.info(
+                    f"Info success for {symbol}: {valid_count} metrics")
+            else:
+                logger.debug(f"No valid metrics in info for {symbol}")
+        else:
+            logger.debug(f"Limited info response for {symbol}")
 
-        # Strategy 3: Try fast_info as lightweight fallback
+        # Strategy 3: Try fast_info as lightweight fallback (only when info
+        # came back empty, to avoid spending an extra rate-limited request)
         if not info_data:
             try:
                 logger.debug(f"Trying fast_info fallback for {symbol}")
-                fast_info = ticker.fast_info
-
-                if fast_info:
-                    # Get basic metrics from fast_info
-                    try:
-                        if hasattr(fast_info, 'market_cap') and fast_info.market_cap:
-                            info_data['market_cap'] = fast_info.market_cap
-                        if hasattr(fast_info, 'shares') and fast_info.shares:
-                            info_data['shares_outstanding'] = fast_info.shares
-
-                        if info_data:
-                            logger.info(f"Fast info success for {symbol}")
-                    except:
-                        logger.debug(
-                            f"Could not extract fast_info data for {symbol}")
-
+                info_data = await _run_blocking(_fetch_fast_info_metrics, ticker)
+                if info_data:
+                    logger.info(f"Fast info success for {symbol}")
             except Exception as e:
                 logger.debug(f"Fast info failed for {symbol}: {e}")
 
@@ -302,6 +468,12 @@ async def fetch_fundamentals_yf(symbol: str) -> FinancialMetrics:
         metrics_data = {k: v for k, v in metrics_data.items()
                         if v is not None and v != 0}
 
+        # Both requests failing outright means Yahoo is down or blocking us
+        if isinstance(hist_result, Exception) and isinstance(info_result, Exception):
+            _YF_CB.record_failure()
+        elif metrics_data:
+            _YF_CB.record_success()
+
         # Log final results
         if metrics_data:
             logger.info(
@@ -313,18 +485,20 @@ async def fetch_fundamentals_yf(symbol: str) -> FinancialMetrics:
         return FinancialMetrics(**metrics_data)
 
     except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "Too Many Requests" in error_msg:
+        if is_provider_fault(e):
+            _YF_CB.record_failure()
+        kind = classify_exception(e)
+        if kind is ErrorKind.RATE_LIMIT:
             logger.warning(
-                f"Yahoo Finance rate limited for {symbol}: {error_msg}")
-        elif "Expecting value" in error_msg:
+                f"Yahoo Finance rate limited for {symbol}: {e}")
+        elif kind is ErrorKind.BLOCKED:
             logger.warning(
                 f"Yahoo Finance blocked requests for {symbol} - returning empty metrics")
-        elif any(keyword in error_msg.lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        elif kind is ErrorKind.DISCONNECT:
             logger.info(
-                f"🛑 Client disconnection detected during fundamentals fetch for {symbol}: {error_msg}")
+                f"🛑 Client disconnection detected during fundamentals fetch for {symbol}: {e}")
         else:
-            logger.error(f"Fundamentals error for {symbol}: {error_msg}")
+            logger.error(f"Fundamentals error for {symbol}: {e}")
 
         # Always return empty metrics rather than failing
         return FinancialMetrics()
@@ -340,31 +514,43 @@ async def fetch_analyst_ratings_finnhub(symbol: str) -> List[AnalystRating]:
             "Finnhub client not configured - skipping analyst ratings")
         return []
 
+    if _FINNHUB_CB.is_open():
+        logger.debug(f"Finnhub circuit open - skipping analyst ratings for {symbol}")
+        return []
+
     try:
         # Get recommendation trends (this should work on free tier)
-        recommendations = finnhub_client.recommendation_trends(symbol)
+        await _FINNHUB_BUCKET.acquire()
+        recommendations = await _run_blocking(
+            finnhub_client.recommendation_trends, symbol)
 
         ratings = []
         if recommendations:
             for rec in recommendations[:5]:  # Limit to 5 most recent
-                if rec.get("period"):
+                period = rec.get("period")
+                if period:
+                    # Periods are ISO dates (YYYY-MM-DD); fromisoformat is
+                    # much cheaper than strptime
                     rating = AnalystRating(
                         firm="Consensus",
                         rating=f"Buy: {rec.get('buy', 0)}, Hold: {rec.get('hold', 0)}, Sell: {rec.get('sell', 0)}",
-                        date=datetime.strptime(
-                            rec["period"], "%Y-%m-%d") if rec.get("period") else None
+                        date=datetime.fromisoformat(period)
                     )
                     ratings.append(rating)
 
         # Skip price targets as they require premium tier
         logger.debug(f"Got {len(ratings)} analyst ratings from Finnhub")
+        _FINNHUB_CB.record_success()
         return ratings
 
     except Exception as e:
-        if "403" in str(e) or "don't have access" in str(e):
+        if is_provider_fault(e):
+            _FINNHUB_CB.record_failure()
+        kind = classify_exception(e)
+        if kind is ErrorKind.ACCESS_DENIED:
             logger.debug(
                 f"Finnhub API access denied (check API key or upgrade plan): {e}")
-        elif any(keyword in str(e).lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        elif kind is ErrorKind.DISCONNECT:
             logger.info(
                 f"🛑 Client disconnection detected during analyst ratings fetch for {symbol}: {e}")
         else:
@@ -376,105 +562,82 @@ async def fetch_analyst_ratings_finnhub(symbol: str) -> List[AnalystRating]:
 @create_retry_decorator()
 @track_performance("source_yfinance_earnings")
 async def fetch_earnings_data_yf(symbol: str) -> List[EarningsData]:
-    """Fetch earnings data from Yahoo Finance with correct methods"""
-    # Add delay to avoid rate limiting
-    await asyncio.sleep(1.5)
+    """Fetch earnings data from Yahoo Finance with correct methods
+
+    Combines the TTM/forward EPS from ticker.info with the latest periods of
+    the income statement. Both are fetched side by side on the shared
+    Ticker, which usually already holds the info from the fundamentals
+    lookup.
+    """
+    # Wait for Yahoo Finance quota to avoid rate limiting
+    await _YF_BUCKET.acquire()
 
     earnings_data = []
 
     try:
-        ticker = yf.Ticker(symbol)
-        try:
-            info = ticker.info
-            if info and isinstance(info, dict):
-                # Get trailing EPS if available
-                if info.get("trailingEps"):
-                    earning = EarningsData(
-                        eps_actual=float(info["trailingEps"]),
-                        quarter="TTM",
-                        year=datetime.now().year
-                    )
-                    earnings_data.append(earning)
-
-                # Get forward EPS if available
-                if info.get("forwardEps"):
-                    earning = EarningsData(
-                        eps_estimate=float(info["forwardEps"]),
-                        quarter="Forward",
-                        year=datetime.now().year + 1
-                    )
-                    earnings_data.append(earning)
+        ticker = _get_ticker(symbol)
+        info, income_stmt = await asyncio.gather(
+            _run_blocking(lambda: ticker.info),
+            _run_blocking(lambda: ticker.income_stmt),
+            return_exceptions=True
+        )
 
-        except Exception as e:
-            if "429" in str(e):
-                logger.debug(f"Rate limited getting earnings info: {e}")
+        # Trailing and forward EPS from ticker.info
+        if isinstance(info, Exception):
+            if classify_exception(info) is ErrorKind.RATE_LIMIT:
+                logger.debug(f"Rate limited getting earnings info: {info}")
             else:
-                logger.debug(f"Could not get earnings from info: {e}")
-
-        # Try to get earnings from income statement
-        try:
-            income_stmt = ticker.income_stmt
-            if income_stmt is not None and not income_stmt.empty:
-                # Handle multi-index columns if present
-                if hasattr(income_stmt, 'columns') and isinstance(income_stmt.columns, pd.MultiIndex):
-                    income_stmt.columns = income_stmt.columns.droplevel(1)
-
-                # Look for Net Income in the most recent quarters
-                if 'Net Income' in income_stmt.index:
-                    net_income_row = income_stmt.loc['Net Income']
-                    for i, (date, value) in enumerate(net_income_row.head(4).items()):
-                        if pd.notna(value) and i < 4:  # Limit to 4 quarters
-                            try:
-                                quarter = f"Q{((date.month-1)//3)+1}"
-                                # Convert to EPS (approximate, would need shares outstanding)
-                                earning = EarningsData(
-                                    revenue_actual=float(
-                                        value) if value > 0 else None,
-                                    quarter=quarter,
-                                    year=date.year
-                                )
-                                earnings_data.append(earning)
-                            except Exception as e:
-                                logger.debug(
-                                    f"Error parsing income statement: {e}")
-                                continue
-
-        except Exception as e:
-            logger.debug(f"Income statement not available: {e}")
-
-        # Fallback: try quarterly_earnings
-        if not earnings_data:
-            try:
-                quarterly = ticker.quarterly_earnings
-                if quarterly is not None and not quarterly.empty:
-                    # Handle multi-index if present
-                    if hasattr(quarterly, 'columns') and isinstance(quarterly.columns, pd.MultiIndex):
-                        quarterly.columns = quarterly.columns.droplevel(1)
-
-                    for date, row in quarterly.head(4).iterrows():
-                        try:
-                            quarter = f"Q{((date.month-1)//3)+1}"
-                            earning = EarningsData(
-                                eps_actual=float(row["Earnings"]) if pd.notna(
-                                    row.get("Earnings")) else None,
-                                revenue_actual=float(row["Revenue"]) if pd.notna(
-                                    row.get("Revenue")) else None,
-                                quarter=quarter,
-                                year=date.year
-                            )
-                            earnings_data.append(earning)
-                        except Exception as e:
-                            logger.debug(
-                                f"Error parsing quarterly earnings: {e}")
-                            continue
-
-            except Exception as e:
-                logger.debug(f"Quarterly earnings fallback failed: {e}")
+                logger.debug(f"Could not get earnings from info: {info}")
+        elif info and isinstance(info, dict):
+            current_year = datetime.now().year
+
+            # Get trailing EPS if available
+            if info.get("trailingEps"):
+                earning = EarningsData(
+                    eps_actual=float(info["trailingEps"]),
+                    quarter="TTM",
+                    year=current_year
+                )
+                earnings_data.append(earning)
+
+            # Get forward EPS if available
+            if info.get("forwardEps"):
+                earning = EarningsData(
+                    eps_estimate=float(info["forwardEps"]),
+                    quarter="Forward",
+                    year=current_year + 1
+                )
+                earnings_data.append(earning)
+
+        # Earnings from the income statement
+        if isinstance(income_stmt, Exception):
+            logger.debug(f"Income statement not available: {income_stmt}")
+        elif income_stmt is not None and not income_stmt.empty:
+            # Handle multi-index columns if present
+            if hasattr(income_stmt, 'columns') and isinstance(income_stmt.columns, pd.MultiIndex):
+                income_stmt.columns = income_stmt.columns.droplevel(1)
+
+            # Look for Net Income in the most recent quarters
+            if 'Net Income' in income_stmt.index:
+                # Limit to 4 periods, dropping missing values and
+                # mapping dates to quarters column-wise
+                net_income_row = income_stmt.loc['Net Income'].head(
+                    4).dropna()
+                dates = pd.DatetimeIndex(net_income_row.index)
+                quarters = (dates.month - 1) // 3 + 1
+                for quarter, year, value in zip(quarters, dates.year, net_income_row.to_numpy(dtype=float)):
+                    # Convert to EPS (approximate, would need shares outstanding)
+                    earnings_data.append(EarningsData(
+                        revenue_actual=float(value) if value > 0 else None,
+                        quarter=f"Q{quarter}",
+                        year=int(year)
+                    ))
 
     except Exception as e:
-        if "429" in str(e) or "Too Many Requests" in str(e):
+        kind = classify_exception(e)
+        if kind is ErrorKind.RATE_LIMIT:
             logger.debug(f"Yahoo Finance rate limited for earnings: {e}")
-        elif any(keyword in str(e).lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        elif kind is ErrorKind.DISCONNECT:
             logger.info(
                 f"🛑 Client disconnection detected during earnings fetch for {symbol}: {e}")
         else:
@@ -483,29 +646,38 @@ async def fetch_earnings_data_yf(symbol: str) -> List[EarningsData]:
     return earnings_data
 
 
+@async_ttl_cache(settings.cache_ttl_company, persist_dir=settings.cache_dir)
+async def fetch_company_name_yf(symbol: str) -> Optional[str]:
+    """Look up the company name from Yahoo Finance (None if unavailable)"""
+    # Wait for Yahoo Finance quota to avoid rate limiting
+    await _YF_BUCKET.acquire()
+
+    ticker = _get_ticker(symbol)
+
+    # Try to get basic info with short timeout
+    info = await _run_blocking(lambda: ticker.info)
+    if info and isinstance(info, dict):
+        return info.get("longName") or info.get("shortName")
+
+    return None
+
+
 async def get_company_name(symbol: str) -> Optional[str]:
     """Get company name with better fallback strategy"""
     try:
-        validate_stock_symbol(symbol)
-
-        # Add delay to reduce rate limiting
-        await asyncio.sleep(0.5)
-
-        ticker = yf.Ticker(symbol)
+        symbol = validate_stock_symbol(symbol)
 
-        # Try to get basic info with short timeout
-        info = ticker.info
-        if info and isinstance(info, dict):
-            name = info.get("longName") or info.get("shortName")
-            if name:
-                return name
+        name = await fetch_company_name_yf(symbol)
+        if name:
+            return name
 
     except InvalidSymbolError:
         raise
     except Exception as e:
-        if "429" in str(e):
+        kind = classify_exception(e)
+        if kind is ErrorKind.RATE_LIMIT:
             logger.debug(f"Rate limited getting company name for {symbol}")
-        elif any(keyword in str(e).lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        elif kind is ErrorKind.DISCONNECT:
             logger.info(
                 f"🛑 Client disconnection detected during company name fetch for {symbol}: {e}")
         else:
@@ -514,26 +686,111 @@ async def get_company_name(symbol: str) -> Optional[str]:
     return f"{symbol} Corporation"
 
 
-# Main functions for agents
+def _has_metrics(metrics: FinancialMetrics) -> bool:
+    """Only cache fundamentals that actually contain data"""
+    # Only fields passed at construction can be non-None - check those
+    # directly instead of dumping the whole model
+    return any(getattr(metrics, name) is not None for name in metrics.model_fields_set)
+
+
+# Main functions for agents (cached per symbol, concurrent lookups coalesced;
+# all but the short-lived price quotes can also be persisted to CACHE_DIR)
+@async_ttl_cache(settings.cache_ttl_price)
 async def fetch_current_price(symbol: str) -> Dict[str, Any]:
     """Main function to fetch current price with fallback"""
-    validate_stock_symbol(symbol)
+    symbol = validate_stock_symbol(symbol)
     return await fetch_price_with_fallback(symbol)
 
 
+async def fetch_current_prices(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch current prices for several symbols, batching the Yahoo Finance
+    lookups into one request.
+
+    Symbols the batch misses go through the regular per-symbol fallback
+    chain; symbols that fail there too are left out of the result.
+    """
+    symbols = [validate_stock_symbol(symbol) for symbol in symbols]
+    if len(symbols) == 1:
+        return {symbols[0]: await fetch_current_price(symbols[0])}
+
+    try:
+        prices = await fetch_prices_yfinance_batch(symbols)
+    except Exception as e:
+        logger.warning(f"Batch price fetch failed for {len(symbols)} symbols: {e}")
+        prices = {}
+
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    results = await asyncio.gather(
+        *(fetch_current_price(symbol) for symbol in missing), return_exceptions=True)
+    for symbol, result in zip(missing, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to fetch price for {symbol}: {result}")
+        else:
+            prices[symbol] = result
+    return prices
+
+
+@async_ttl_cache(settings.cache_ttl_fundamentals, cache_if=_has_metrics,
+                 persist_dir=settings.cache_dir)
 async def fetch_financial_metrics(symbol: str) -> FinancialMetrics:
     """Main function to fetch comprehensive financial metrics"""
-    validate_stock_symbol(symbol)
+    symbol = validate_stock_symbol(symbol)
     return await fetch_fundamentals_yf(symbol)
 
 
+@async_ttl_cache(settings.cache_ttl_analyst, persist_dir=settings.cache_dir)
 async def fetch_analyst_ratings(symbol: str) -> List[AnalystRating]:
     """Main function to fetch analyst ratings"""
-    validate_stock_symbol(symbol)
+    symbol = validate_stock_symbol(symbol)
     return await fetch_analyst_ratings_finnhub(symbol)
 
 
+async def fetch_analyst_ratings_batch(symbols: List[str]) -> Dict[str, List[AnalystRating]]:
+    """
+    Fetch analyst ratings for several symbols concurrently.
+
+    At most 5 Finnhub lookups run at once (each holds a worker thread);
+    symbols whose lookup fails are left out of the result.
+    """
+    symbols = [validate_stock_symbol(symbol) for symbol in symbols]
+
+    semaphore = asyncio.Semaphore(5)
+
+    async def fetch_one(symbol: str) -> List[AnalystRating]:
+        async with semaphore:
+            return await fetch_analyst_ratings(symbol)
+
+    results = await asyncio.gather(
+        *(fetch_one(symbol) for symbol in symbols), return_exceptions=True)
+
+    ratings = {}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to fetch analyst ratings for {symbol}: {result}")
+        else:
+            ratings[symbol] = result
+    return ratings
+
+
+@async_ttl_cache(settings.cache_ttl_earnings, persist_dir=settings.cache_dir)
 async def fetch_earnings_data(symbol: str) -> List[EarningsData]:
     """Main function to fetch earnings data"""
-    validate_stock_symbol(symbol)
+    symbol = validate_stock_symbol(symbol)
     return await fetch_earnings_data_yf(symbol)
+
+
+async def prime_symbol_cache(symbols: List[str]):
+    """Pre-populate the long-lived caches for a watchlist of symbols"""
+    # One symbol at a time so warm-up doesn't burst into provider rate limits
+    for symbol in symbols:
+        results = await asyncio.gather(
+            fetch_financial_metrics(symbol),
+            fetch_analyst_ratings(symbol),
+            fetch_earnings_data(symbol),
+            get_company_name(symbol),
+            return_exceptions=True
+        )
+        failed = sum(isinstance(result, Exception) for result in results)
+        logger.info(
+            f"Primed cache for {symbol} ({len(results) - failed}/{len(results)} sources)")
@@ -1,19 +1,27 @@
-import httpx
 from openai import AsyncOpenAI
+import asyncio
 import feedparser
 from datetime import datetime, timedelta, timezone
 import re
-from typing import List, Dict, Any
+import time
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from loguru import logger
-import statistics
+import orjson
 from app.config import settings
 from app.utils.error_handling import (
     handle_api_errors,
     create_retry_decorator,
+    ErrorKind,
+    classify_exception,
     DataNotFoundError
 )
 from app.utils.monitoring import track_performance
+from app.utils.caching import async_ttl_cache
+from app.services.http_client import get_http_client
 from app.schemas import SentimentItem, SentimentSummary, SentimentScore
 
 # Initialize clients
@@ -38,6 +46,22 @@ RSS_FEEDS = [
     "https://seekingalpha.com/market_currents.xml",  # Seeking Alpha (working)
 ]
 
+# Everything but word characters and whitespace is dropped from titles
+# before comparing them. ASCII titles (nearly all of them) use the cheaper
+# str.translate with a table of the ASCII characters the pattern matches.
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_ASCII_PUNCT_TBL = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if _NON_WORD_RE.match(c)))
+
+
+def _title_key(title: str, length: int = 100) -> str:
+    """Normalized title prefix used to detect duplicate articles"""
+    if title.isascii():
+        title = title.translate(_ASCII_PUNCT_TBL)
+    else:
+        title = _NON_WORD_RE.sub("", title)
+    return title.casefold().strip()[:length]
+
 
 @handle_api_errors
 @create_retry_decorator()
@@ -47,28 +71,75 @@ async def fetch_news_articles(symbol: str, days_back: int = None) -> List[Dict[s
     days_back = days_back or settings.news_days_back
     from_date = (datetime.now() - timedelta(days=days_back)).isoformat()
 
-    async with httpx.AsyncClient(timeout=settings.http_timeout) as client:
-        response = await client.get(
-            NEWS_URL,
-            params={
-                "q": f'"{symbol}" AND (stock OR shares OR earnings OR revenue OR financial OR investment OR market)',
-                "from": from_date,
-                "sortBy": "relevancy",
-                "apiKey": settings.newsapi_key,
-                "language": "en",
-                "pageSize": settings.max_news_articles,
-                "domains": "reuters.com,bloomberg.com,cnbc.com,marketwatch.com,yahoo.com,seekingalpha.com,wsj.com,ft.com,forbes.com,benzinga.com",
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
+    client = get_http_client()
+    response = await client.get(
+        NEWS_URL,
+        params={
+            "q": f'"{symbol}" AND (stock OR shares OR earnings OR revenue OR financial OR investment OR market)',
+            "from": from_date,
+            "sortBy": "relevancy",
+            "apiKey": settings.newsapi_key,
+            "language": "en",
+            "pageSize": settings.max_news_articles,
+            "domains": "reuters.com,bloomberg.com,cnbc.com,marketwatch.com,yahoo.com,seekingalpha.com,wsj.com,ft.com,forbes.com,benzinga.com",
+        },
+    )
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if data.get("status") == "error":
+        raise DataNotFoundError(
+            f"NewsAPI error: {data.get('message', 'Unknown error')}")
+
+    articles = data.get("articles", [])
+    return articles
 
-        if data.get("status") == "error":
-            raise DataNotFoundError(
-                f"NewsAPI error: {data.get('message', 'Unknown error')}")
 
-        articles = data.get("articles", [])
-        return articles
+# Parsed feeds by URL: (fetched at, ETag, Last-Modified, feed). Feeds are
+# shared by every symbol, so one download serves all lookups within the TTL.
+_RSS_CACHE: Dict[str, tuple[float, Optional[str], Optional[str], feedparser.FeedParserDict]] = {}
+
+
+async def fetch_rss_feed(feed_url: str) -> Optional[feedparser.FeedParserDict]:
+    """
+    Fetch and parse one RSS feed, or None if the server didn't return it.
+
+    A feed fetched within the last cache_ttl_rss_feed seconds is reused as
+    is. After that it is revalidated with If-None-Match/If-Modified-Since,
+    and a 304 reuses the parsed feed without downloading or parsing it again.
+    """
+    now = time.monotonic()
+    cached = _RSS_CACHE.get(feed_url)
+    if cached and now - cached[0] < settings.cache_ttl_rss_feed:
+        return cached[3]
+
+    headers = {}
+    if cached:
+        _, etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = await get_http_client().get(feed_url, headers=headers, timeout=15)
+
+    if response.status_code == 304 and cached:
+        _RSS_CACHE[feed_url] = (now, *cached[1:])
+        return cached[3]
+
+    if response.status_code != 200:
+        logger.warning(
+            f"RSS feed {feed_url} returned status {response.status_code}")
+        return None
+
+    # feedparser is pure-Python and CPU-bound; parse off the event loop.
+    # It takes the raw bytes (it detects the encoding itself), and links in
+    # entry content are never followed, so they aren't resolved.
+    feed = await asyncio.to_thread(feedparser.parse, response.content,
+                                   resolve_relative_uris=False)
+    _RSS_CACHE[feed_url] = (now, response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"), feed)
+    return feed
 
 
 @handle_api_errors
@@ -79,22 +150,24 @@ async def fetch_rss_news(symbol: str) -> List[Dict[str, Any]]:
     all_articles = []
     company_name, search_terms = await get_company_query_terms(symbol)
 
+    relevance_matcher = build_relevance_matcher(tuple(search_terms))
+
     logger.info(
         f"RSS search for {symbol} ({company_name}) using terms: {search_terms}")
 
-    for feed_url in RSS_FEEDS:
-        try:
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.get(feed_url)
-
-                if response.status_code != 200:
-                    logger.warning(
-                        f"RSS feed {feed_url} returned status {response.status_code}")
-                    continue
+    # Request every feed at once over the shared client
+    feeds = await asyncio.gather(
+        *(fetch_rss_feed(feed_url) for feed_url in RSS_FEEDS),
+        return_exceptions=True
+    )
 
-                feed_content = response.text
+    for feed_url, feed in zip(RSS_FEEDS, feeds):
+        try:
+            if isinstance(feed, BaseException):
+                raise feed
 
-            feed = feedparser.parse(feed_content)
+            if feed is None:
+                continue
 
             if not feed.entries:
                 logger.warning(f"No entries found in RSS feed {feed_url}")
@@ -105,25 +178,13 @@ async def fetch_rss_news(symbol: str) -> List[Dict[str, Any]]:
                 title = entry.get("title", "")
                 description = entry.get("description", "")
                 summary = entry.get("summary", "")
-                content = f"{title} {description} {summary}".lower()
-
-                # Enhanced relevance checking with word boundaries
-                is_relevant = False
-                matched_terms = []
+                content = f"{title} {description} {summary}"
 
-                for term in search_terms:
-                    # Use word boundaries for better matching
-                    if len(term) <= 4:  # Short terms like symbols need exact word match
-                        pattern = r'\b' + re.escape(term) + r'\b'
-                    else:  # Longer terms can be part of words
-                        pattern = re.escape(term)
-
-                    if re.search(pattern, content, re.IGNORECASE):
-                        is_relevant = True
-                        matched_terms.append(term)
-                        break
-
-                if is_relevant:
+                # Relevance check: substring tests for company names, one
+                # word-boundary scan for symbols
+                matched_term = find_relevant_term(content, relevance_matcher)
+                if matched_term:
+                    matched_terms = [matched_term]
                     published = entry.get("published_parsed")
                     published_dt = None
                     if published:
@@ -142,7 +203,8 @@ async def fetch_rss_news(symbol: str) -> List[Dict[str, Any]]:
                         "title": title,
                         "description": description or summary,
                         "url": entry.get("link", ""),
-                        "publishedAt": published_dt.isoformat() if published_dt else None,
+                        # Always a string, so the articles sort by it directly
+                        "publishedAt": published_dt.isoformat() if published_dt else "",
                         "source": {"name": feed_title},
                         "matched_terms": matched_terms  # For debugging
                     }
@@ -162,14 +224,13 @@ async def fetch_rss_news(symbol: str) -> List[Dict[str, Any]]:
     seen_titles = set()
     for article in all_articles:
         # Create a normalized title for duplicate detection
-        normalized_title = re.sub(r'[^\w\s]', '', article.get(
-            "title", "")).lower().strip()[:100]
+        normalized_title = _title_key(article.get("title", ""))
         if normalized_title and normalized_title not in seen_titles:
             seen_titles.add(normalized_title)
             unique_articles.append(article)
 
     # Sort by publication date (most recent first)
-    unique_articles.sort(key=lambda x: x.get("publishedAt", ""), reverse=True)
+    unique_articles.sort(key=itemgetter("publishedAt"), reverse=True)
 
     logger.info(
         f"RSS news summary for {symbol}: {len(unique_articles)} unique articles from {len(RSS_FEEDS)} feeds")
@@ -241,7 +302,6 @@ SYMBOL_TO_COMPANY = {
     'MA': 'Mastercard Inc.',
     'DIS': 'Walt Disney',
     'CMCSA': 'Comcast Corporation',
-    'NFLX': 'Netflix Inc.',
     'T': 'AT&T Inc.',
     'VZ': 'Verizon Communications',
     'KO': 'Coca-Cola Company',
@@ -266,15 +326,25 @@ SYMBOL_TO_COMPANY = {
     'GE': 'General Electric',
     'F': 'Ford Motor',
     'GM': 'General Motors',
-    'TSLA': 'Tesla Inc.',
 }
 
+# Read-only, with keys normalized to upper case once at import
+SYMBOL_TO_COMPANY = MappingProxyType(
+    {symbol.upper(): name for symbol, name in SYMBOL_TO_COMPANY.items()})
+
+# Trailing suffixes stripped from company names to get the name as used in
+# headlines (anchored, so e.g. "Company" mid-name is left alone)
+_COMPANY_SUFFIX_RE = re.compile(
+    r'\s+(?:Inc\.|Corp\.|Corporation|Company|Ltd\.|Co\.|Group|Holdings|Technologies|Systems)$',
+    re.IGNORECASE)
+
 
 async def get_company_query_terms(symbol: str) -> tuple[str, List[str]]:
     """Get company name and comprehensive search terms"""
     try:
         # First try our static mapping
-        company_name = SYMBOL_TO_COMPANY.get(symbol.upper())
+        symbol_upper = symbol.upper()
+        company_name = SYMBOL_TO_COMPANY.get(symbol_upper)
 
         # If not found, try to get from market data service
         if not company_name:
@@ -285,15 +355,17 @@ async def get_company_query_terms(symbol: str) -> tuple[str, List[str]]:
                 pass
 
         # Generate comprehensive search terms
-        search_terms = [symbol.lower(), symbol.upper()]
+        search_terms = [symbol.lower(), symbol_upper]
 
         if company_name:
             # Add full company name
             search_terms.append(company_name.lower())
 
             # Add company name without common suffixes
-            clean_name = company_name.replace(' Inc.', '').replace(' Corp.', '').replace(' Corporation', '').replace(' Company', '').replace(
-                ' Ltd.', '').replace(' Co.', '').replace(' Group', '').replace(' Holdings', '').replace(' Technologies', '').replace(' Systems', '').strip()
+            clean_name = company_name.strip()
+            # Suffixes can stack ("... Holdings Group")
+            while (stripped := _COMPANY_SUFFIX_RE.sub('', clean_name)) != clean_name:
+                clean_name = stripped
             if clean_name.lower() not in search_terms:
                 search_terms.append(clean_name.lower())
 
@@ -303,10 +375,7 @@ async def get_company_query_terms(symbol: str) -> tuple[str, List[str]]:
                 search_terms.append(first_word)
 
         # Remove duplicates while preserving order
-        unique_terms = []
-        for term in search_terms:
-            if term not in unique_terms:
-                unique_terms.append(term)
+        unique_terms = list(dict.fromkeys(search_terms))
 
         return company_name or symbol, unique_terms
 
@@ -315,38 +384,74 @@ async def get_company_query_terms(symbol: str) -> tuple[str, List[str]]:
         return symbol, [symbol.lower()]
 
 
+@lru_cache(maxsize=256)
+def build_relevance_matcher(search_terms: tuple[str, ...]) -> tuple[tuple[str, ...], re.Pattern]:
+    """
+    Split search terms into plain substrings and a whole-word pattern.
+
+    Long terms (more than 4 characters) can be part of words, so they are
+    checked with plain substring tests on lowercased text. Short terms (like
+    symbols) must match as whole words and are compiled into one
+    case-insensitive alternation.
+    """
+    long_terms = tuple(term.lower() for term in search_terms if len(term) > 4)
+    short_terms = [re.escape(term) for term in search_terms if len(term) <= 4]
+
+    # A pattern that never matches when there is nothing to search for
+    short_pattern = re.compile(
+        r'\b(?:' + '|'.join(short_terms) + r')\b' if short_terms else r'(?!)',
+        re.IGNORECASE)
+    return long_terms, short_pattern
+
+
+def find_relevant_term(content: str, matcher: tuple[tuple[str, ...], re.Pattern]) -> Optional[str]:
+    """Return the (lowercased) search term found in content, if any"""
+    long_terms, short_pattern = matcher
+    lowered = content.lower()
+    for term in long_terms:
+        if term in lowered:
+            return term
+
+    # Only the word-boundary terms need the regex engine
+    match = short_pattern.search(content)
+    return match.group(0).lower() if match else None
+
+
+@lru_cache(maxsize=4096)
 def analyze_polarity_vader(text: str) -> float:
-    """Analyze sentiment polarity using VADER"""
+    """Analyze sentiment polarity using VADER
+
+    Cached by text: the same headlines recur across feeds and across the
+    symbols they mention.
+    """
+    if not text or text.isspace():
+        return 0.0
+
     scores = vader_analyzer.polarity_scores(text)
     return scores['compound']  # Returns -1 to 1
 
 
+# Rule-based sentiment indicators, compiled once into one case-insensitive
+# alternation per polarity. Groups are non-capturing since only the number
+# of matches is used.
+_POSITIVE_PATTERNS = [
+    r'\b(?:beat|beats|beating|exceeded?|outperformed?|surge|surged|surging|record|records|up|growth|grow|growing|gains?|rally|bullish|optimistic|positive|strong|strength|robust|solid|impressive|excellent|outstanding|breakthrough|success|profit|profits|revenue|earnings|buy|upgrade|target|raised?|increase|increased?|boost|boosted?)\b',
+    r'\b(?:all.?time.?high|new.?high|higher|rising|climbed?|jumped?|soared?|rallied?|gained?|advanced?)\b'
+]
+_NEGATIVE_PATTERNS = [
+    r'\b(?:miss|missed?|missing|underperformed?|drop|dropped?|dropping|fell|fall|falling|decline|declined?|declining|crash|crashed?|plunge|plunged?|tumble|tumbled?|loss|losses|lawsuit|lawsuits?|down|bearish|pessimistic|negative|weak|weakness|poor|disappointing|concerning|worried?|fear|fears|sell|downgrade|lowered?|decrease|decreased?|cut|slashed?)\b',
+    r'\b(?:all.?time.?low|new.?low|lower|sinking|slumped?|retreated?|lost|erased?)\b'
+]
+_POSITIVE_RE = re.compile('|'.join(_POSITIVE_PATTERNS), re.IGNORECASE)
+_NEGATIVE_RE = re.compile('|'.join(_NEGATIVE_PATTERNS), re.IGNORECASE)
+
+
 def analyze_polarity_rule_based(text: str) -> float:
     """
     Enhanced rule-based polarity analysis
     """
-    # Positive indicators
-    positive_patterns = [
-        r'\b(beat|beats|beating|exceeded?|outperformed?|surge|surged|surging|record|records|up|growth|grow|growing|gains?|rally|bullish|optimistic|positive|strong|strength|robust|solid|impressive|excellent|outstanding|breakthrough|success|profit|profits|revenue|earnings|buy|upgrade|target|raised?|increase|increased?|boost|boosted?)\b',
-        r'\b(all.?time.?high|new.?high|higher|rising|climbed?|jumped?|soared?|rallied?|gained?|advanced?)\b'
-    ]
-
-    # Negative indicators
-    negative_patterns = [
-        r'\b(miss|missed?|missing|underperformed?|drop|dropped?|dropping|fell|fall|falling|decline|declined?|declining|crash|crashed?|plunge|plunged?|tumble|tumbled?|loss|losses|lawsuit|lawsuits?|down|bearish|pessimistic|negative|weak|weakness|poor|disappointing|concerning|worried?|fear|fears|sell|downgrade|lowered?|decrease|decreased?|cut|slashed?)\b',
-        r'\b(all.?time.?low|new.?low|lower|sinking|slumped?|retreated?|lost|erased?)\b'
-    ]
-
-    text_lower = text.lower()
-
-    positive_score = 0
-    negative_score = 0
-
-    for pattern in positive_patterns:
-        positive_score += len(re.findall(pattern, text_lower))
-
-    for pattern in negative_patterns:
-        negative_score += len(re.findall(pattern, text_lower))
+    positive_score = len(_POSITIVE_RE.findall(text))
+    negative_score = len(_NEGATIVE_RE.findall(text))
 
     total = positive_score + negative_score
     if total == 0:
@@ -399,8 +504,7 @@ async def generate_ai_summary(symbol: str, sentiment_items: List[SentimentItem],
         return summary
 
     except Exception as e:
-        error_msg = str(e)
-        if any(keyword in error_msg.lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        if classify_exception(e) is ErrorKind.DISCONNECT:
             logger.info(
                 f"🛑 Client disconnection detected during OpenAI summarization: {e}")
         else:
@@ -442,13 +546,10 @@ async def analyze_sentiment_openai(text: str) -> Dict[str, Any]:
 
         result_text = response.choices[0].message.content.strip()
         # Parse JSON response
-        import json
-        result = json.loads(result_text)
-        return result
+        return orjson.loads(result_text)
 
     except Exception as e:
-        error_msg = str(e)
-        if any(keyword in error_msg.lower() for keyword in ["disconnected", "cancelled", "closed", "connection"]):
+        if classify_exception(e) is ErrorKind.DISCONNECT:
             logger.info(
                 f"🛑 Client disconnection detected during OpenAI sentiment analysis: {e}")
         else:
@@ -456,6 +557,107 @@ async def analyze_sentiment_openai(text: str) -> Dict[str, Any]:
         raise DataNotFoundError("OpenAI sentiment analysis failed")
 
 
+@handle_api_errors
+@create_retry_decorator()
+@track_performance("source_openai_sentiment")
+async def analyze_sentiments_openai_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze sentiment of several texts in a single OpenAI request
+
+    Returns one {"sentiment_score", "confidence"} dict per text, in order.
+    """
+    if not settings.use_openai_sentiment or not settings.openai_api_key:
+        raise DataNotFoundError("OpenAI sentiment analysis not configured")
+
+    numbered_texts = "\n".join(
+        f"{i}. {orjson.dumps(text).decode()}" for i, text in enumerate(texts))
+
+    prompt = f"""
+    Analyze the sentiment of each of these {len(texts)} financial news texts and provide for each:
+    1. Overall sentiment score (-1 to 1, where -1 is very negative, 0 is neutral, 1 is very positive)
+    2. Confidence score (0 to 1)
+    
+    Texts:
+    {numbered_texts}
+    
+    Respond in JSON format, with element i of "results" for text i:
+    {{
+        "results": [{{"sentiment_score": <float>, "confidence": <float>}}, ...]
+    }}
+    """
+
+    try:
+        response = await openai_client.chat.completions.create(
+            model=settings.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=settings.sentiment_temperature,
+            max_tokens=30 * len(texts) + 50,
+            response_format={"type": "json_object"}
+        )
+
+        result = orjson.loads(response.choices[0].message.content)
+
+    except Exception as e:
+        if classify_exception(e) is ErrorKind.DISCONNECT:
+            logger.info(
+                f"🛑 Client disconnection detected during OpenAI batch sentiment analysis: {e}")
+        else:
+            logger.error(f"OpenAI batch sentiment analysis failed: {e}")
+        raise DataNotFoundError("OpenAI batch sentiment analysis failed")
+
+    results = result.get("results") if isinstance(result, dict) else None
+    if not isinstance(results, list) or len(results) != len(texts):
+        raise DataNotFoundError(
+            f"OpenAI batch sentiment returned an unexpected shape for {len(texts)} texts")
+    return results
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """Text of an article used for sentiment analysis"""
+    return f"{article.get('title', '')} {article.get('description', '')}"
+
+
+def needs_openai_score(text: str) -> bool:
+    """
+    Whether OpenAI should score this text.
+
+    Short texts are skipped, as are texts VADER scores clearly and the
+    rule-based analyzer agrees on the direction of, since OpenAI wouldn't
+    change their sentiment category.
+    """
+    if len(text) <= 20:
+        return False
+    vader_score = analyze_polarity_vader(text)
+    if abs(vader_score) < settings.openai_confidence_gate:
+        return True
+    # Rule-based scores are mostly -1, 0 or 1, so compare signs only
+    return vader_score * analyze_polarity_rule_based(text) <= 0
+
+
+async def fetch_openai_polarities(texts: List[str]) -> Dict[int, float]:
+    """
+    OpenAI sentiment scores for the texts that need them (see
+    needs_openai_score), keyed by index, from one batched request (empty if
+    OpenAI is disabled or fails).
+    """
+    if not settings.use_openai_sentiment:
+        return {}
+
+    indices = [i for i, text in enumerate(texts) if needs_openai_score(text)]
+    if not indices:
+        return {}
+
+    try:
+        results = await analyze_sentiments_openai_batch([texts[i] for i in indices])
+    except Exception as e:
+        logger.warning(f"OpenAI sentiment unavailable, using local scores: {e}")
+        return {}
+
+    return {
+        i: result.get("sentiment_score", 0)
+        for i, result in zip(indices, results) if isinstance(result, dict)
+    }
+
+
 def sentiment_score_to_enum(score: float) -> SentimentScore:
     """Convert numerical sentiment score to enum"""
     if score >= 0.5:
@@ -470,11 +672,42 @@ def sentiment_score_to_enum(score: float) -> SentimentScore:
         return SentimentScore.NEUTRAL
 
 
-async def analyze_article_sentiment(article: Dict[str, Any]) -> SentimentItem:
-    """Analyze sentiment for a single article"""
+def summarize_polarities(polarities: List[float]) -> tuple[int, int, int, float, float]:
+    """
+    Aggregate article polarities in a single pass.
+
+    Returns (positive_count, negative_count, neutral_count, mean, sample stdev),
+    using Welford's update for the mean/variance so no second pass is needed.
+    """
+    positive_count = negative_count = 0
+    mean = 0.0
+    sum_sq_diff = 0.0
+
+    for n, polarity in enumerate(polarities, start=1):
+        if polarity > 0.15:
+            positive_count += 1
+        elif polarity < -0.15:
+            negative_count += 1
+
+        delta = polarity - mean
+        mean += delta / n
+        sum_sq_diff += delta * (polarity - mean)
+
+    count = len(polarities)
+    stdev = (sum_sq_diff / (count - 1)) ** 0.5 if count > 1 else 0.0
+    neutral_count = count - positive_count - negative_count
+
+    return positive_count, negative_count, neutral_count, mean, stdev
+
+
+async def analyze_article_sentiment(article: Dict[str, Any], openai_score: Optional[float] = None) -> SentimentItem:
+    """Analyze sentiment for a single article
+
+    openai_score is the article's score from the batched OpenAI analysis
+    (see fetch_openai_polarities), if any.
+    """
     title = article.get("title", "")
-    description = article.get("description", "")
-    text = f"{title} {description}"
+    text = article_text(article)
 
     # Try multiple sentiment analysis methods
     polarity_scores = []
@@ -494,17 +727,12 @@ async def analyze_article_sentiment(article: Dict[str, Any]) -> SentimentItem:
         pass
 
     # OpenAI sentiment (if enabled and available)
-    # Only for substantial text
-    if settings.use_openai_sentiment and len(text) > 20:
-        try:
-            openai_result = await analyze_sentiment_openai(text)
-            polarity_scores.append(openai_result.get("sentiment_score", 0))
-        except:
-            pass
+    if openai_score is not None:
+        polarity_scores.append(openai_score)
 
     # Calculate average polarity
-    final_polarity = statistics.mean(
-        polarity_scores) if polarity_scores else 0.0
+    final_polarity = (sum(polarity_scores) / len(polarity_scores)
+                      if polarity_scores else 0.0)
 
     # Parse published date
     published_at = None
@@ -525,23 +753,30 @@ async def analyze_article_sentiment(article: Dict[str, Any]) -> SentimentItem:
     )
 
 
+# A tuple is always truthy, so cache only results that found articles
+@async_ttl_cache(settings.cache_ttl_sentiment, cache_if=lambda r: bool(r[0]),
+                 persist_dir=settings.cache_dir)
 async def fetch_comprehensive_sentiment(symbol: str) -> tuple[List[SentimentItem], SentimentSummary]:
     """Fetch comprehensive sentiment analysis from multiple sources"""
     all_articles = []
 
-    # Fetch from NewsAPI
-    try:
-        news_articles = await fetch_news_articles(symbol)
+    # Fetch from NewsAPI and RSS feeds concurrently; NewsAPI articles still
+    # come first for deduplication
+    news_articles, rss_articles = await asyncio.gather(
+        fetch_news_articles(symbol),
+        fetch_rss_news(symbol),
+        return_exceptions=True
+    )
+
+    if isinstance(news_articles, Exception):
+        logger.warning(f"Failed to fetch NewsAPI articles: {news_articles}")
+    else:
         all_articles.extend(news_articles)
-    except Exception as e:
-        logger.warning(f"Failed to fetch NewsAPI articles: {e}")
 
-    # Fetch from RSS feeds
-    try:
-        rss_articles = await fetch_rss_news(symbol)
+    if isinstance(rss_articles, Exception):
+        logger.warning(f"Failed to fetch RSS articles: {rss_articles}")
+    else:
         all_articles.extend(rss_articles)
-    except Exception as e:
-        logger.warning(f"Failed to fetch RSS articles: {e}")
 
     if not all_articles:
         return [], SentimentSummary(
@@ -557,17 +792,21 @@ async def fetch_comprehensive_sentiment(symbol: str) -> tuple[List[SentimentItem
     unique_articles = []
     seen_titles = set()
     for article in all_articles:
-        title_key = re.sub(r'[^\w\s]', '', article.get(
-            "title", "")).lower()[:50]
+        title_key = _title_key(article.get("title", ""), 50)
         if title_key not in seen_titles:
             seen_titles.add(title_key)
             unique_articles.append(article)
 
-    # Analyze sentiment for each article
+    # Analyze sentiment for each article, with the OpenAI scores for all of
+    # them fetched in one request
+    articles = unique_articles[:settings.max_news_articles]
+    openai_scores = await fetch_openai_polarities(
+        [article_text(article) for article in articles])
+
     sentiment_items = []
-    for article in unique_articles[:settings.max_news_articles]:
+    for i, article in enumerate(articles):
         try:
-            sentiment_item = await analyze_article_sentiment(article)
+            sentiment_item = await analyze_article_sentiment(article, openai_scores.get(i))
             sentiment_items.append(sentiment_item)
         except Exception as e:
             logger.warning(f"Failed to analyze sentiment for article: {e}")
@@ -584,15 +823,10 @@ async def fetch_comprehensive_sentiment(symbol: str) -> tuple[List[SentimentItem
         )
 
     # Calculate overall sentiment summary
-    polarities = [item.polarity for item in sentiment_items]
-    avg_polarity = statistics.mean(polarities)
-
-    positive_count = sum(1 for p in polarities if p > 0.15)
-    negative_count = sum(1 for p in polarities if p < -0.15)
-    neutral_count = len(polarities) - positive_count - negative_count
+    positive_count, negative_count, neutral_count, avg_polarity, polarity_std = \
+        summarize_polarities([item.polarity for item in sentiment_items])
 
     # Calculate confidence based on agreement between sources
-    polarity_std = statistics.stdev(polarities) if len(polarities) > 1 else 0
     # Lower std dev = higher confidence
     confidence = max(0, 1 - (polarity_std / 2))
 
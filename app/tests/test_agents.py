@@ -1,4 +1,7 @@
 import pytest
+import asyncio
+import orjson
+from app import agents
 from app.agents import orchestrate
 from app.schemas import StockRequest
 from unittest.mock import patch, AsyncMock
@@ -113,3 +116,37 @@ async def test_orchestration_performance():
     # Should complete within 30 seconds
     assert end_time - start_time < 45
     assert res.symbol == "TSLA"
+
+
+@pytest.mark.asyncio
+async def test_stream_cancels_all_agents_when_closed_early(monkeypatch):
+    """Test that closing the stream after the first event stops every agent"""
+    started, cancelled = [], []
+
+    def slow_agent(name):
+        async def agent(state):
+            started.append(name)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+            return {}
+        return agent
+
+    for name in ("price_agent", "fundamentals_agent", "analyst_agent",
+                 "sentiment_agent", "company_info_agent"):
+        monkeypatch.setattr(agents, name, slow_agent(name))
+
+    stream = agents.stream_coordinated_analysis("AAPL")
+    assert orjson.loads(await anext(stream))["status"] == "started"
+    processing = orjson.loads(await anext(stream))
+    assert processing["status"] == "processing"
+    assert "progress" not in processing
+    await asyncio.sleep(0.01)  # let the agents start
+
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert len(started) == 5
+    assert sorted(cancelled) == sorted(started)
@@ -1,5 +1,7 @@
 import pytest
+import asyncio
 from httpx import AsyncClient, ASGITransport
+from app import main
 from app.main import app
 from fastapi.testclient import TestClient
 
@@ -11,7 +13,47 @@ async def test_analyze_stream_endpoint():
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         r = await ac.post("/analyze-stream", json={"symbol": "AAPL"})
     assert r.status_code == 200
-    assert r.headers["content-type"] == "text/plain; charset=utf-8"
+    assert r.headers["content-type"] == "text/event-stream; charset=utf-8"
+
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_when_client_disconnects(monkeypatch):
+    """Test that a client disconnect cancels the running analysis"""
+    analysis_stopped = asyncio.Event()
+
+    async def endless_analysis(symbol):
+        try:
+            while True:
+                yield b'{"status": "processing"}'
+                await asyncio.sleep(0.01)
+        finally:
+            analysis_stopped.set()
+
+    monkeypatch.setattr(main, "stream_coordinated_analysis", endless_analysis)
+
+    messages = [{"type": "http.request", "body": b'{"symbol": "AAPL"}', "more_body": False}]
+    frames = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            frames.append(message["body"])
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/analyze-stream",
+             "raw_path": b"/analyze-stream", "root_path": "", "query_string": b"",
+             "headers": [(b"content-type", b"application/json")],
+             "server": ("test", 80), "client": ("test", 1234)}
+    await asyncio.wait_for(app(scope, receive, send), timeout=2)
+
+    assert frames
+    assert analysis_stopped.is_set()
 
 
 @pytest.mark.asyncio
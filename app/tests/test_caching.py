@@ -0,0 +1,113 @@
+import pytest
+import asyncio
+from typing import List
+from app.schemas import AnalystRating, SentimentItem, SentimentScore, SentimentSummary
+from app.utils.caching import async_ttl_cache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced():
+    """Test that concurrent lookups for the same key share one call"""
+    calls = []
+
+    @async_ttl_cache(60)
+    async def fetch(symbol):
+        calls.append(symbol)
+        await asyncio.sleep(0.05)
+        return {"symbol": symbol}
+
+    results = await asyncio.gather(fetch("AAPL"), fetch("AAPL"), fetch("MSFT"))
+
+    assert calls.count("AAPL") == 1
+    assert calls.count("MSFT") == 1
+    assert results[0] is results[1]
+
+    # Subsequent call is served from the cache
+    await fetch("AAPL")
+    assert calls.count("AAPL") == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_and_failed_results_are_refetched():
+    """Test that expired entries, exceptions and empty results are not reused"""
+    calls = []
+
+    @async_ttl_cache(0.01)
+    async def fetch(symbol):
+        calls.append(symbol)
+        if symbol == "FAIL":
+            raise ValueError("boom")
+        return [] if symbol == "EMPTY" else [symbol]
+
+    await fetch("AAPL")
+    await asyncio.sleep(0.02)
+    await fetch("AAPL")
+    assert calls.count("AAPL") == 2
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await fetch("FAIL")
+        await fetch("EMPTY")
+    assert calls.count("FAIL") == 2
+    assert calls.count("EMPTY") == 2
+
+
+@pytest.mark.asyncio
+async def test_persisted_results_survive_memory_clear(tmp_path):
+    """Test that persisted entries are reloaded as models after a restart"""
+    calls = []
+
+    @async_ttl_cache(60, persist_dir=str(tmp_path))
+    async def fetch(symbol) -> List[AnalystRating]:
+        calls.append(symbol)
+        return [AnalystRating(firm="Firm", rating="Buy")]
+
+    first = await fetch("AAPL")
+    await asyncio.sleep(0.05)  # let the background write finish
+
+    # A fresh process only has the disk copy
+    fetch.cache_clear()
+    second = await fetch("AAPL")
+
+    assert calls == ["AAPL"]
+    assert second == first
+    assert isinstance(second[0], AnalystRating)
+
+    # cache=False always calls through
+    await fetch("AAPL", cache=False)
+    assert calls == ["AAPL", "AAPL"]
+
+
+@pytest.mark.asyncio
+async def test_persisted_tuples_round_trip(tmp_path):
+    """Test that tuple results come back typed and empty ones are not persisted"""
+    calls = []
+    summary = SentimentSummary(
+        overall_score=SentimentScore.POSITIVE, confidence=0.8,
+        positive_count=1, negative_count=0, neutral_count=0,
+        summary_text="Mostly positive")
+
+    @async_ttl_cache(60, cache_if=lambda r: bool(r[0]), persist_dir=str(tmp_path))
+    async def fetch(symbol) -> tuple[List[SentimentItem], SentimentSummary]:
+        calls.append(symbol)
+        if symbol == "NONE":
+            return [], summary
+        item = SentimentItem(source="NewsAPI", title="Apple beats estimates",
+                             polarity=0.6, sentiment_score=SentimentScore.POSITIVE)
+        return [item], summary
+
+    first = await fetch("AAPL")
+    await fetch("NONE")
+    await asyncio.sleep(0.05)  # let the background write finish
+
+    fetch.cache_clear()
+    items, loaded_summary = await fetch("AAPL")
+    assert calls == ["AAPL", "NONE"]
+    assert (items, loaded_summary) == first
+    assert isinstance(items[0], SentimentItem)
+    assert loaded_summary.overall_score is SentimentScore.POSITIVE
+
+    # Only the AAPL entry was written
+    assert len(list(tmp_path.rglob("*.json"))) == 1
+    await fetch("NONE")
+    assert calls == ["AAPL", "NONE", "NONE"]
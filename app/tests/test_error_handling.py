@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+from app.utils import error_handling
+from app.utils.error_handling import (
+    APIRateLimitError,
+    CircuitBreaker,
+    DataNotFoundError,
+    FallbackManager,
+    InvalidSymbolError,
+    StockDataError,
+    handle_api_errors
+)
+from app.utils.monitoring import track_performance
+
+
+@pytest.mark.asyncio
+async def test_fallback_runs_when_primary_is_rate_limited():
+    """Test that an Alpha Vantage 429 falls through to Yahoo Finance"""
+    calls = []
+
+    async def fetch_price_alpha(symbol):
+        calls.append("alpha_vantage")
+        raise APIRateLimitError("Alpha Vantage API rate limit exceeded")
+
+    async def fetch_price_yfinance(symbol):
+        calls.append("yfinance")
+        return {"price": 150.0, "source": "yfinance"}
+
+    manager = FallbackManager()
+    result = await manager.execute_with_fallback(
+        "price", "AAPL", fetch_price_alpha, [fetch_price_yfinance])
+
+    assert calls == ["alpha_vantage", "yfinance"]
+    assert result["source"] == "yfinance"
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_is_per_source():
+    """Test that repeated primary failures skip only the primary"""
+    calls = []
+
+    async def primary(symbol):
+        calls.append("primary")
+        raise APIRateLimitError("rate limited")
+
+    async def fallback(symbol):
+        calls.append("fallback")
+        return {"price": 1.0}
+
+    manager = FallbackManager()
+    for _ in range(4):
+        await manager.execute_with_fallback("price", "AAPL", primary, [fallback])
+
+    # Three failures open the primary's circuit; the fallback keeps running
+    assert calls.count("primary") == 3
+    assert calls.count("fallback") == 4
+
+    async def failing_fallback(symbol):
+        raise APIRateLimitError("rate limited")
+
+    with pytest.raises(StockDataError):
+        await manager.execute_with_fallback("price", "AAPL", primary, [failing_fallback])
+
+
+def test_circuit_lets_one_trial_call_through_after_cooldown(monkeypatch):
+    """Test that an open circuit admits a single trial call once the cooldown ends"""
+    clock = [100.0]
+    monkeypatch.setattr(error_handling, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.is_open()
+
+    clock[0] += 30
+    assert not breaker.is_open()  # the trial call
+    assert breaker.is_open()      # everyone else waits on it
+
+    # A failed trial reopens for a full cooldown; a successful one closes
+    breaker.record_failure()
+    clock[0] += 29
+    assert breaker.is_open()
+    clock[0] += 1
+    assert not breaker.is_open()
+    breaker.record_success()
+    assert not breaker.is_open()
+    assert not breaker.is_open()
+
+
+@pytest.mark.asyncio
+async def test_bad_symbols_do_not_open_the_circuit():
+    """Test that lookups of an unknown symbol leave the sources' circuits closed"""
+    @handle_api_errors
+    @track_performance("test_primary")
+    async def primary(symbol):
+        if symbol == "ZZZZ":
+            raise InvalidSymbolError(f"Invalid symbol: {symbol}")
+        return {"price": 150.0, "source": "primary"}
+
+    @handle_api_errors
+    @track_performance("test_fallback")
+    async def fallback(symbol):
+        if symbol == "ZZZZ":
+            raise DataNotFoundError(f"No price data found for {symbol}")
+        return {"price": 150.0, "source": "fallback"}
+
+    manager = FallbackManager()
+    for _ in range(3):
+        with pytest.raises(StockDataError):
+            await manager.execute_with_fallback("price", "ZZZZ", primary, [fallback])
+
+    # Each decorated source keeps its own breaker, and neither opened
+    assert len(manager.circuit_breakers) == 2
+    assert not any(b.is_open() for b in manager.circuit_breakers.values())
+    result = await manager.execute_with_fallback("price", "AAPL", primary, [fallback])
+    assert result["source"] == "primary"
+
+
+@pytest.mark.asyncio
+async def test_hedged_fallback_starts_when_primary_is_slow():
+    """Test that a slow primary is raced against the fallback and cancelled"""
+    primary_cancelled = asyncio.Event()
+
+    async def slow_primary(symbol):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+        return {"price": 1.0, "source": "primary"}
+
+    async def fallback(symbol):
+        return {"price": 2.0, "source": "fallback"}
+
+    manager = FallbackManager()
+    result = await asyncio.wait_for(manager.execute_hedged(
+        "price", "AAPL", slow_primary, [fallback], hedge_after=0.05), timeout=1)
+
+    assert result["source"] == "fallback"
+    await asyncio.sleep(0)
+    assert primary_cancelled.is_set()
@@ -0,0 +1,171 @@
+import pytest
+import asyncio
+import httpx
+import pandas as pd
+from datetime import datetime
+from types import SimpleNamespace
+from app.config import settings
+from app.schemas import AnalystRating, EarningsData
+from app.utils.error_handling import DataNotFoundError
+from app.services import market_data
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_hedged_price_calls_do_not_starve_alpha_vantage(monkeypatch):
+    """Test that hedged calls skip an exhausted Alpha Vantage quota and leave it to refill"""
+    clock = [1000.0]
+    # The buckets' own clock; the event loop keeps real time
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+
+    alpha_requests = []
+
+    async def slow_alpha(request: httpx.Request) -> httpx.Response:
+        alpha_requests.append(request)
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={})
+
+    async def fetch_price_yfinance(symbol):
+        return {"price": 150.0, "source": "yfinance"}
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_alpha))
+    monkeypatch.setattr(market_data, "get_http_client", lambda: client)
+    monkeypatch.setattr(market_data, "fetch_price_yfinance", fetch_price_yfinance)
+    monkeypatch.setattr(market_data, "PRICE_HEDGE_AFTER", 0.01)
+    monkeypatch.setattr(settings, "alpha_vantage_key", "test_alpha_key")
+    monkeypatch.setattr(market_data.fallback_manager, "circuit_breakers", {})
+    bucket = TokenBucket(rate=5 / 60, capacity=2)
+    monkeypatch.setattr(market_data, "_ALPHA_BUCKET", bucket)
+
+    for _ in range(5):
+        result = await market_data.fetch_price_with_fallback("AAPL")
+        assert result["source"] == "yfinance"
+
+    # Only the two available tokens were spent; later calls didn't queue
+    # for (or go into debt on) the primary's quota
+    assert len(alpha_requests) == 2
+    assert bucket._tokens == 0
+
+    # Once the quota refills, the primary is tried again
+    clock[0] += 12
+    await market_data.fetch_price_with_fallback("AAPL")
+    assert len(alpha_requests) == 3
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_earnings_combine_info_eps_and_income_statement(monkeypatch):
+    """Test that earnings hold the TTM/forward EPS followed by income statement periods"""
+    income_stmt = pd.DataFrame(
+        {pd.Timestamp("2024-09-30"): [93.7e9, 391.0e9],
+         pd.Timestamp("2023-09-30"): [97.0e9, 383.3e9],
+         pd.Timestamp("2022-09-30"): [float("nan"), 394.3e9]},
+        index=["Net Income", "Total Revenue"])
+    ticker = SimpleNamespace(
+        info={"trailingEps": 6.08, "forwardEps": 7.45},
+        income_stmt=income_stmt)
+    monkeypatch.setattr(market_data, "_get_ticker", lambda symbol: ticker)
+    monkeypatch.setattr(market_data, "_YF_BUCKET", TokenBucket(rate=1, capacity=1))
+
+    earnings = await market_data.fetch_earnings_data_yf("AAPL")
+
+    year = datetime.now().year
+    assert earnings == [
+        EarningsData(eps_actual=6.08, quarter="TTM", year=year),
+        EarningsData(eps_estimate=7.45, quarter="Forward", year=year + 1),
+        EarningsData(revenue_actual=93.7e9, quarter="Q3", year=2024),
+        EarningsData(revenue_actual=97.0e9, quarter="Q3", year=2023),
+    ]
+
+
+def _download_frame():
+    """A yf.download(group_by="ticker") frame: AAPL has data, MSFT failed"""
+    nan = float("nan")
+    columns = pd.MultiIndex.from_product([["AAPL", "MSFT"], ["Open", "Close", "Volume"]])
+    return pd.DataFrame(
+        [[148.0, 150.0, 1e6, nan, nan, nan],
+         [150.0, 153.0, 2e6, nan, nan, nan]],
+        index=pd.to_datetime(["2024-06-03", "2024-06-04"]),
+        columns=columns)
+
+
+@pytest.fixture
+def batch_download(monkeypatch):
+    """Serve _download_frame() from yf.download and record the calls"""
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append((tickers, kwargs))
+        return _download_frame()
+
+    monkeypatch.setattr(market_data.yf, "download", download)
+    monkeypatch.setattr(market_data, "_YF_BUCKET", TokenBucket(rate=1, capacity=1))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_batch_prices_leave_out_symbols_without_data(batch_download):
+    """Test that one download prices every symbol it has data for"""
+    prices = await market_data.fetch_prices_yfinance_batch(["AAPL", "MSFT", "ZZZZ"])
+
+    assert [tickers for tickers, _ in batch_download] == ["AAPL MSFT ZZZZ"]
+    assert batch_download[0][1]["group_by"] == "ticker"
+    # MSFT came back all-NaN and ZZZZ is missing from the frame entirely
+    assert list(prices) == ["AAPL"]
+    assert prices["AAPL"]["price"] == 153.0
+    assert prices["AAPL"]["change"] == 3.0
+    assert prices["AAPL"]["volume"] == 2000000
+
+
+@pytest.mark.asyncio
+async def test_current_prices_fall_back_per_symbol_for_batch_misses(batch_download, monkeypatch):
+    """Test that batch misses go through the per-symbol chain and failures are dropped"""
+    fallback_calls = []
+
+    async def fetch_price_with_fallback(symbol):
+        fallback_calls.append(symbol)
+        if symbol == "ZZZZ":
+            raise DataNotFoundError(f"No price data found for {symbol}")
+        return {"price": 410.0, "source": "alpha_vantage"}
+
+    monkeypatch.setattr(market_data, "fetch_price_with_fallback", fetch_price_with_fallback)
+    market_data.fetch_current_price.cache_clear()
+
+    prices = await market_data.fetch_current_prices(["aapl", "msft", "zzzz"])
+
+    assert len(batch_download) == 1
+    assert sorted(fallback_calls) == ["MSFT", "ZZZZ"]
+    assert sorted(prices) == ["AAPL", "MSFT"]
+    assert prices["AAPL"]["price"] == 153.0
+    assert prices["AAPL"]["source"] == "yfinance"
+    assert prices["MSFT"] == {"price": 410.0, "source": "alpha_vantage"}
+    market_data.fetch_current_price.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_analyst_ratings_batch_limits_concurrency(monkeypatch):
+    """Test that at most 5 lookups run at once and failing symbols are dropped"""
+    in_flight, peak = 0, 0
+
+    async def fetch_analyst_ratings(symbol):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if symbol.startswith("X"):
+                raise DataNotFoundError(f"No ratings for {symbol}")
+            return [AnalystRating(firm="Consensus", rating="Buy: 5, Hold: 1, Sell: 0")]
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(market_data, "fetch_analyst_ratings", fetch_analyst_ratings)
+
+    symbols = ["AA", "AB", "XA", "AC", "AD", "XB", "AE", "AF", "AG", "XC", "AH", "AI"]
+    ratings = await market_data.fetch_analyst_ratings_batch(symbols)
+
+    assert peak == 5
+    assert list(ratings) == [s for s in symbols if not s.startswith("X")]
+    assert ratings["AA"][0].firm == "Consensus"
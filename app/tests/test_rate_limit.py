@@ -0,0 +1,47 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_bursts_then_paces():
+    """Test that calls within capacity pass immediately and later ones wait their turn"""
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    with patch.object(rate_limit, "time", SimpleNamespace(monotonic=lambda: 100.0)), \
+            patch.object(rate_limit.asyncio, "sleep", fake_sleep):
+        bucket = TokenBucket(rate=20.0, capacity=3)
+
+        for _ in range(3):
+            await bucket.acquire()
+        assert sleeps == []
+
+        # Two calls over capacity wait for one and two refills at 20 per second
+        await bucket.acquire()
+        await bucket.acquire()
+        assert sleeps == pytest.approx([0.05, 0.1])
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_return_their_tokens():
+    """Test that cancelling callers while they wait doesn't leave the bucket in debt"""
+    with patch.object(rate_limit, "time", SimpleNamespace(monotonic=lambda: 100.0)):
+        bucket = TokenBucket(rate=5 / 60, capacity=5)
+        for _ in range(5):
+            await bucket.acquire()
+
+        waiters = [asyncio.create_task(bucket.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert bucket._tokens == -3
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(waiter.cancelled() for waiter in waiters)
+        assert bucket._tokens == 0
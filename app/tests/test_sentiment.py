@@ -0,0 +1,80 @@
+import re
+import pytest
+import httpx
+from app.config import settings
+from app.services import sentiment
+
+FEED_URL = "https://example.com/feed.xml"
+FEED_XML = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>Apple beats estimates</title><link>https://example.com/1</link></item>
+</channel></rss>"""
+
+
+@pytest.mark.asyncio
+async def test_rss_feed_is_cached_and_revalidated(monkeypatch):
+    """Test that a fresh feed is reused and a stale one is revalidated with its ETag"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=FEED_XML, headers={"ETag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(sentiment, "get_http_client", lambda: client)
+    monkeypatch.setattr(sentiment, "_RSS_CACHE", {})
+
+    feed = await sentiment.fetch_rss_feed(FEED_URL)
+    assert feed.entries[0].title == "Apple beats estimates"
+
+    # Within the TTL the parsed feed is reused without a request
+    assert await sentiment.fetch_rss_feed(FEED_URL) is feed
+    assert len(requests) == 1
+
+    # Once stale, a 304 keeps the parsed feed
+    monkeypatch.setattr(settings, "cache_ttl_rss_feed", 0)
+    assert await sentiment.fetch_rss_feed(FEED_URL) is feed
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_empty_sentiment_is_not_cached(monkeypatch):
+    """Test that a lookup that found no articles is retried rather than cached"""
+    calls = []
+
+    async def no_articles(symbol):
+        calls.append(symbol)
+        return []
+
+    monkeypatch.setattr(sentiment, "fetch_news_articles", no_articles)
+    monkeypatch.setattr(sentiment, "fetch_rss_news", no_articles)
+
+    items, summary = await sentiment.fetch_comprehensive_sentiment("NOARTICLES")
+    assert items == []
+    assert summary.summary_text == "No sentiment data available"
+
+    await sentiment.fetch_comprehensive_sentiment("NOARTICLES")
+    assert len(calls) == 4  # both sources, twice
+
+
+def test_title_key_drops_all_punctuation():
+    """Test that title keys drop every non-word character, ASCII or not"""
+    titles = [
+        "Apple's Q3: beats estimates!",
+        "«Apple» beats estimates — again…",
+        "¿Apple beats estimates? ¡Sí! (★★★★☆)",
+        "Apple\x7f beats\x00 estimates • €5B buyback ™",
+        "Über-growth: Tesla's ‘record’ quarter",
+    ]
+    for title in titles:
+        # Same characters removed as the original regex
+        expected = re.sub(r'[^\w\s]', '', title).casefold().strip()
+        assert sentiment._title_key(title) == expected
+
+    assert sentiment._title_key("«Apple» beats “estimates”…") == \
+        sentiment._title_key("Apple beats estimates")
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple, get_type_hints
+from loguru import logger
+from pydantic import TypeAdapter
+
+
+class DiskCache:
+    """JSON files under directory/<function>/, one per cache key.
+
+    Values are (de)serialized with a pydantic TypeAdapter for the cached
+    function's return type, so models come back as models.
+    """
+
+    def __init__(self, directory: str, namespace: str, return_type: Any):
+        self.directory = os.path.join(directory, namespace)
+        self.adapter = TypeAdapter(return_type)
+
+    def _path(self, key: Tuple) -> str:
+        digest = hashlib.md5(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, key: Tuple) -> Optional[Tuple[Any, float]]:
+        """Return (value, seconds left) for an unexpired entry, else None"""
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at = float(f.readline())
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    return None
+                return self.adapter.validate_json(f.read()), remaining
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable cache entry for {key}: {e}")
+            return None
+
+    def save(self, key: Tuple, value: Any, ttl_seconds: float):
+        """Write an entry atomically (write to a temp file, then rename)"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(f"{time.time() + ttl_seconds}\n".encode())
+                f.write(self.adapter.dump_json(value))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist cache entry for {key}: {e}")
+
+
+def async_ttl_cache(ttl_seconds: float, maxsize: int = 1024, cache_if: Callable[[Any], bool] = bool,
+                    persist_dir: Optional[str] = None):
+    """
+    Cache an async function's results for ttl_seconds, keyed by its arguments.
+
+    Concurrent calls with the same arguments share one in-flight call instead
+    of each dispatching their own. Exceptions are never cached, and results
+    for which cache_if(result) is false (empty by default) are not stored.
+
+    With persist_dir set, entries are also written to disk so they survive
+    restarts; this needs a return type annotation to deserialize with.
+    Pass cache=False to a decorated call to bypass the cache entirely.
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: Dict[Tuple, Tuple[Any, float]] = {}
+        in_flight: Dict[Tuple, asyncio.Task] = {}
+
+        disk = None
+        if persist_dir:
+            return_type = get_type_hints(func).get("return")
+            if return_type is None:
+                logger.warning(
+                    f"Not persisting {func.__qualname__}: no return type annotation")
+            else:
+                disk = DiskCache(persist_dir, func.__qualname__, return_type)
+
+        async def load_or_call(key: Tuple, args: Tuple, kwargs: Dict) -> Tuple[Any, float]:
+            """Return the value and how long it stays fresh"""
+            if disk is not None:
+                entry = await asyncio.to_thread(disk.load, key)
+                if entry is not None:
+                    logger.debug(f"Disk cache hit for {func.__name__}{args}")
+                    return entry
+
+            result = await func(*args, **kwargs)
+
+            if disk is not None and cache_if(result):
+                # Written in the background; the caller doesn't wait on disk
+                asyncio.get_running_loop().run_in_executor(
+                    None, disk.save, key, result, ttl_seconds)
+            return result, ttl_seconds
+
+        def store(key: Tuple, task: asyncio.Task):
+            if in_flight.get(key) is task:
+                del in_flight[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            result, fresh_for = task.result()
+            if not cache_if(result):
+                return
+            if len(entries) >= maxsize:
+                # Drop expired entries first, then the oldest insertion
+                now = time.monotonic()
+                for stale in [k for k, (_, exp) in entries.items() if exp <= now]:
+                    del entries[stale]
+                if len(entries) >= maxsize:
+                    del entries[next(iter(entries))]
+            entries[key] = (result, time.monotonic() + fresh_for)
+
+        @wraps(func)
+        async def wrapper(*args, cache: bool = True, **kwargs):
+            if not cache:
+                return await func(*args, **kwargs)
+
+            key = (args, tuple(sorted(kwargs.items())))
+
+            entry = entries.get(key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at > time.monotonic():
+                    logger.debug(f"Cache hit for {func.__name__}{args}")
+                    return result
+                del entries[key]
+
+            task = in_flight.get(key)
+            if task is None or task.get_loop() is not asyncio.get_running_loop():
+                task = asyncio.ensure_future(load_or_call(key, args, kwargs))
+                in_flight[key] = task
+                task.add_done_callback(lambda t: store(key, t))
+
+            # Shield so one caller going away does not cancel the shared call
+            result, _ = await asyncio.shield(task)
+            return result
+
+        def cache_clear():
+            """Clear the in-memory cache (persisted entries are kept)"""
+            entries.clear()
+            in_flight.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -1,13 +1,17 @@
 import asyncio
+import time
 import traceback
-from typing import Any, Callable, Type, List
-from functools import wraps
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Type, List
+from functools import lru_cache, wraps
+import httpx
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
     retry_if_exception_type,
-    before_sleep_log
+    before_sleep_log,
+    RetryError
 )
 from loguru import logger
 from app.config import settings
@@ -43,26 +47,112 @@ class ServiceUnavailableError(StockDataError):
     pass
 
 
+class ErrorKind(Enum):
+    """What a provider error message indicates"""
+    RATE_LIMIT = "rate_limit"
+    ACCESS_DENIED = "access_denied"
+    BLOCKED = "blocked"
+    SESSION = "session"
+    DISCONNECT = "disconnect"
+    OTHER = "other"
+
+
+_RATE_LIMIT_MARKERS = ("429", "too many requests", "rate limit")
+_ACCESS_DENIED_MARKERS = ("403", "don't have access")
+# Message keywords marking a dropped connection or client
+_CLOSED_KEYWORDS = ("disconnected", "cancelled", "closed")
+_DISCONNECT_KEYWORDS = _CLOSED_KEYWORDS + ("connection",)
+_CLIENT_GONE_KEYWORDS = _CLOSED_KEYWORDS + ("client",)
+_CONTEXT_DISCONNECT_KEYWORDS = _CLIENT_GONE_KEYWORDS + ("connection",)
+
+
+def classify_exception(e: BaseException) -> ErrorKind:
+    """Classify an error by its message (formatted and lowercased once)"""
+    message = str(e).lower()
+    if any(marker in message for marker in _RATE_LIMIT_MARKERS):
+        return ErrorKind.RATE_LIMIT
+    if any(marker in message for marker in _ACCESS_DENIED_MARKERS):
+        return ErrorKind.ACCESS_DENIED
+    if "expecting value" in message:
+        # Yahoo serving an HTML block page instead of JSON
+        return ErrorKind.BLOCKED
+    if "curl_cffi" in message:
+        return ErrorKind.SESSION
+    if any(keyword in message for keyword in _DISCONNECT_KEYWORDS):
+        return ErrorKind.DISCONNECT
+    return ErrorKind.OTHER
+
+
+# Errors that mean the provider itself is struggling, not the request
+_PROVIDER_FAULTS = (
+    APITimeoutError,
+    APIRateLimitError,
+    ServiceUnavailableError,
+    ConnectionError,
+    asyncio.TimeoutError,
+    httpx.TransportError
+)
+_PROVIDER_FAULT_KINDS = (
+    ErrorKind.RATE_LIMIT,
+    ErrorKind.ACCESS_DENIED,
+    ErrorKind.BLOCKED,
+    ErrorKind.SESSION,
+    ErrorKind.DISCONNECT
+)
+
+
+def is_provider_fault(e: BaseException) -> bool:
+    """
+    Whether an error should count against the source's circuit breaker.
+
+    Looks through the StockDataError that handle_api_errors wraps errors in.
+    Bad symbols and missing data say nothing about the provider's health.
+    """
+    cause = e.__cause__ or e
+    if isinstance(cause, RetryError):
+        # Retries ran out; judge by the last attempt's error
+        cause = cause.last_attempt.exception() or cause
+    if isinstance(cause, (InvalidSymbolError, DataNotFoundError)):
+        return False
+    if isinstance(cause, _PROVIDER_FAULTS):
+        return True
+    status = getattr(getattr(cause, "response", None), "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return classify_exception(cause) in _PROVIDER_FAULT_KINDS
+
+
+# Exceptions retried by default
+DEFAULT_RETRY_EXCEPTIONS = (
+    APITimeoutError,
+    ServiceUnavailableError,
+    ConnectionError,
+    asyncio.TimeoutError
+)
+
+
+@lru_cache(maxsize=64)
+def _build_retry_decorator(max_attempts: int, backoff_factor: float,
+                           retry_exceptions: Tuple[Type[Exception], ...]):
+    """Build a retry decorator once per parameter set (each use still gets its own Retrying)"""
+    return retry(
+        stop=stop_after_attempt(max_attempts),
+        wait=wait_exponential(multiplier=backoff_factor, min=1, max=10),
+        retry=retry_if_exception_type(retry_exceptions),
+        before_sleep=before_sleep_log(logger, "WARNING")
+    )
+
+
 def create_retry_decorator(
     max_attempts: int = None,
     backoff_factor: float = None,
     retry_exceptions: List[Type[Exception]] = None
 ):
     """Create a retry decorator with configurable parameters"""
-    max_attempts = max_attempts or settings.max_retries
-    backoff_factor = backoff_factor or settings.retry_delay
-    retry_exceptions = retry_exceptions or [
-        APITimeoutError,
-        ServiceUnavailableError,
-        ConnectionError,
-        asyncio.TimeoutError
-    ]
-
-    return retry(
-        stop=stop_after_attempt(max_attempts),
-        wait=wait_exponential(multiplier=backoff_factor, min=1, max=10),
-        retry=retry_if_exception_type(tuple(retry_exceptions)),
-        before_sleep=before_sleep_log(logger, "WARNING")
+    return _build_retry_decorator(
+        max_attempts or settings.max_retries,
+        backoff_factor or settings.retry_delay,
+        tuple(retry_exceptions) if retry_exceptions else DEFAULT_RETRY_EXCEPTIONS
     )
 
 
@@ -77,7 +167,7 @@ def handle_api_errors(func: Callable) -> Callable:
             raise APITimeoutError(f"Request timed out: {func.__name__}")
         except ConnectionError as e:
             # Handle connection errors more gracefully (often client disconnection)
-            if any(keyword in str(e).lower() for keyword in ["disconnected", "cancelled", "closed"]):
+            if any(keyword in str(e).lower() for keyword in _CLOSED_KEYWORDS):
                 logger.info(
                     f"Client disconnection detected in {func.__name__}: {e}")
             else:
@@ -87,12 +177,14 @@ def handle_api_errors(func: Callable) -> Callable:
         except Exception as e:
             # Check if it's a client disconnection before logging as error
             error_str = str(e).lower()
-            if any(keyword in error_str for keyword in ["disconnected", "cancelled", "closed", "client"]):
+            if any(keyword in error_str for keyword in _CLIENT_GONE_KEYWORDS):
                 logger.info(f"Client disconnection in {func.__name__}: {e}")
             else:
-                # Log the full traceback for debugging only for real errors
-                logger.error(
-                    f"Unexpected error in {func.__name__}: {e}\n{traceback.format_exc()}")
+                # Log the full traceback for debugging only for real errors;
+                # lazy, so it is only formatted if a sink accepts ERROR
+                logger.opt(lazy=True).error(
+                    "Unexpected error in {}: {}\n{}",
+                    lambda: func.__name__, lambda: e, traceback.format_exc)
             # Re-raise as StockDataError for consistent error handling
             raise StockDataError(f"Error in {func.__name__}: {str(e)}") from e
 
@@ -109,12 +201,13 @@ class ErrorContext:
         self.start_time = None
 
     def __enter__(self):
-        self.start_time = asyncio.get_event_loop().time()
+        self.start_time = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type:
-            duration = asyncio.get_event_loop().time() - self.start_time
+        # Cancellation (e.g. a hedged call that lost the race) isn't an error
+        if exc_type and not issubclass(exc_type, asyncio.CancelledError):
+            duration = time.perf_counter() - self.start_time
             context_info = {
                 "operation": self.operation,
                 "duration": f"{duration:.2f}s",
@@ -124,7 +217,7 @@ class ErrorContext:
 
             # Check if it's a client disconnection error
             error_str = str(exc_val).lower()
-            if any(keyword in error_str for keyword in ["disconnected", "cancelled", "closed", "client", "connection"]):
+            if any(keyword in error_str for keyword in _CONTEXT_DISCONNECT_KEYWORDS):
                 logger.info(
                     f"🛑 Client disconnection detected in {self.operation} for {self.symbol or 'unknown symbol'}",
                     extra={"context": context_info, "error": str(exc_val)}
@@ -136,6 +229,37 @@ class ErrorContext:
                 )
 
 
+class CircuitBreaker:
+    """Skips a data source for a cooldown period after repeated failures"""
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def is_open(self) -> bool:
+        """Whether calls should be skipped (one trial call is let through after the cooldown)"""
+        if self.opened_at is None:
+            return False
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return True
+        # Half-open: this call is the trial; restarting the cooldown keeps
+        # the others out until it succeeds (closing the circuit) or fails
+        self.opened_at = now
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
 class FallbackManager:
     """Manages fallback strategies for data sources"""
 
@@ -146,6 +270,63 @@ class FallbackManager:
             "sentiment": ["newsapi", "rss_feeds", "web_scraping"],
             "analyst_ratings": ["finnhub", "alpha_vantage"]
         }
+        # One breaker per source function, so one provider failing never
+        # puts another into cooldown
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+    def circuit_breaker(self, func: Callable) -> CircuitBreaker:
+        key = f"{func.__module__}.{func.__qualname__}"
+        breaker = self.circuit_breakers.get(key)
+        if breaker is None:
+            breaker = self.circuit_breakers[key] = CircuitBreaker()
+        return breaker
+
+    @staticmethod
+    def _candidates(data_type: str, primary_func: Callable, fallback_funcs: List[Callable]) -> List[tuple]:
+        """(label, operation, function) for each source in the chain"""
+        candidates = [("Primary source", f"primary_{data_type}", primary_func)]
+        candidates += [(f"Fallback {i+1}", f"fallback_{i}_{data_type}", fallback_func)
+                       for i, fallback_func in enumerate(fallback_funcs)]
+        return candidates
+
+    async def _try_source(self, label: str, operation: str, func: Callable, data_type: str,
+                          symbol: str, errors: List[str], **kwargs) -> Any:
+        """
+        Call one source behind its own circuit breaker.
+
+        Returns the result, or None if the source is skipped or fails (the
+        failure is appended to errors). Nothing carries over between sources.
+        """
+        breaker = self.circuit_breaker(func)
+        if breaker.is_open():
+            errors.append(f"{label} skipped: circuit open")
+            logger.debug(
+                f"{label} skipped for {data_type}:{symbol}: {func.__name__} circuit open")
+            return None
+
+        try:
+            with ErrorContext(operation, symbol):
+                result = await func(symbol, **kwargs)
+        except Exception as e:
+            # Only the provider's own faults count toward opening its circuit
+            if is_provider_fault(e):
+                breaker.record_failure()
+            errors.append(f"{label} failed: {str(e)}")
+            logger.warning(f"{label} failed for {data_type}:{symbol}: {e}")
+            return None
+
+        breaker.record_success()
+        if result is not None:
+            logger.info(f"{label} succeeded for {data_type}:{symbol}")
+        return result
+
+    @staticmethod
+    def _all_failed(data_type: str, symbol: str, errors: List[str]) -> StockDataError:
+        error_summary = "; ".join(errors)
+        logger.error(
+            f"All sources failed for {data_type}:{symbol}: {error_summary}")
+        return StockDataError(
+            f"All data sources failed for {data_type}: {error_summary}")
 
     async def execute_with_fallback(
         self,
@@ -157,40 +338,65 @@ class FallbackManager:
     ) -> Any:
         """Execute function with fallback chain"""
         errors = []
+        for candidate in self._candidates(data_type, primary_func, fallback_funcs):
+            result = await self._try_source(*candidate, data_type, symbol, errors, **kwargs)
+            if result is not None:
+                return result
+
+        # All sources failed
+        raise self._all_failed(data_type, symbol, errors)
+
+    async def execute_hedged(
+        self,
+        data_type: str,
+        symbol: str,
+        primary_func: Callable,
+        fallback_funcs: List[Callable],
+        hedge_after: float = 0.8,
+        **kwargs
+    ) -> Any:
+        """
+        Execute function with fallback chain, hedging a slow primary.
+
+        If the primary hasn't answered within hedge_after seconds, the
+        fallbacks are started alongside it and the first usable result wins;
+        the other calls are cancelled. A primary that fails quickly falls
+        back in order, as in execute_with_fallback.
+        """
+        errors = []
+        candidates = self._candidates(data_type, primary_func, fallback_funcs)
+        pending = {asyncio.create_task(
+            self._try_source(*candidates[0], data_type, symbol, errors, **kwargs))}
 
-        # Try primary function first
         try:
-            with ErrorContext(f"primary_{data_type}", symbol):
-                result = await primary_func(symbol, **kwargs)
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                result = done.pop().result()
                 if result is not None:
-                    logger.info(
-                        f"Primary source succeeded for {data_type}:{symbol}")
                     return result
-        except Exception as e:
-            errors.append(f"Primary source failed: {str(e)}")
-            logger.warning(
-                f"Primary source failed for {data_type}:{symbol}: {e}")
-
-        # Try fallback functions
-        for i, fallback_func in enumerate(fallback_funcs):
-            try:
-                with ErrorContext(f"fallback_{i}_{data_type}", symbol):
-                    result = await fallback_func(symbol, **kwargs)
+                for candidate in candidates[1:]:
+                    result = await self._try_source(*candidate, data_type, symbol, errors, **kwargs)
+                    if result is not None:
+                        return result
+                raise self._all_failed(data_type, symbol, errors)
+
+            logger.debug(
+                f"Primary source slow for {data_type}:{symbol}, starting fallbacks")
+            pending |= {asyncio.create_task(
+                self._try_source(*candidate, data_type, symbol, errors, **kwargs))
+                for candidate in candidates[1:]}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
                     if result is not None:
-                        logger.info(
-                            f"Fallback {i+1} succeeded for {data_type}:{symbol}")
                         return result
-            except Exception as e:
-                errors.append(f"Fallback {i+1} failed: {str(e)}")
-                logger.warning(
-                    f"Fallback {i+1} failed for {data_type}:{symbol}: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
 
         # All sources failed
-        error_summary = "; ".join(errors)
-        logger.error(
-            f"All sources failed for {data_type}:{symbol}: {error_summary}")
-        raise StockDataError(
-            f"All data sources failed for {data_type}: {error_summary}")
+        raise self._all_failed(data_type, symbol, errors)
 
 
 class PartialDataHandler:
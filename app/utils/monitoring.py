@@ -1,12 +1,18 @@
+import asyncio
 import time
-from typing import Dict, Optional
-from datetime import datetime
+from collections import Counter as PendingCounter, OrderedDict, defaultdict, deque
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
 from prometheus_client import Counter, Histogram, Gauge, start_http_server
 from loguru import logger
 from app.config import settings
 
 
 class MetricsCollector:
+    # Most labelled metric children kept by _bound (endpoint labels are raw
+    # request paths, so their number isn't fixed)
+    _LABEL_CACHE_SIZE = 1024
+
     def __init__(self):
         # Request metrics
         self.request_count = Counter(
@@ -53,9 +59,20 @@ class MetricsCollector:
             'Number of unique symbols queried'
         )
 
-        self._symbol_cache: Dict[str, datetime] = {}
+        # Symbols queried in the last 24 hours, with (expiry, symbol) in
+        # expiry order so stale ones are dropped from the left
+        self._symbol_expiry: deque[Tuple[float, str]] = deque()
+        self._live_symbols: set[str] = set()
         self._metrics_server_started = False
 
+        # Request metrics buffered in-process and flushed to Prometheus in
+        # batches, keeping its locks off the request path
+        self._pending_requests: PendingCounter = PendingCounter()
+        self._pending_durations: Dict[str, List[float]] = defaultdict(list)
+
+        # Labelled metric children by (metric, label values), see _bound
+        self._label_cache: OrderedDict[Tuple[Any, Tuple[str, ...]], Any] = OrderedDict()
+
     def start_metrics_server(self):
         """Start Prometheus metrics server"""
         if settings.enable_metrics and not self._metrics_server_started:
@@ -67,39 +84,76 @@ class MetricsCollector:
             except Exception as e:
                 logger.error(f"Failed to start metrics server: {e}")
 
+    def _bound(self, metric, *label_values: str):
+        """Return metric's child for label_values, memoized so hot paths skip .labels()"""
+        key = (metric, label_values)
+        child = self._label_cache.get(key)
+        if child is None:
+            child = self._label_cache[key] = metric.labels(*label_values)
+            if len(self._label_cache) > self._LABEL_CACHE_SIZE:
+                self._label_cache.popitem(last=False)
+        else:
+            self._label_cache.move_to_end(key)
+        return child
+
     def record_request(self, endpoint: str, status: str, duration: float):
-        """Record API request metrics"""
-        self.request_count.labels(endpoint=endpoint, status=status).inc()
-        self.request_duration.labels(endpoint=endpoint).observe(duration)
+        """Record API request metrics (applied on the next flush)"""
+        self._pending_requests[(endpoint, status)] += 1
+        self._pending_durations[endpoint].append(duration)
+
+    def flush_request_metrics(self):
+        """Apply buffered request metrics to the Prometheus collectors"""
+        pending_requests = self._pending_requests
+        pending_durations = self._pending_durations
+        self._pending_requests = PendingCounter()
+        self._pending_durations = defaultdict(list)
+
+        for (endpoint, status), count in pending_requests.items():
+            self._bound(self.request_count, endpoint, status).inc(count)
+        for endpoint, durations in pending_durations.items():
+            histogram = self._bound(self.request_duration, endpoint)
+            for duration in durations:
+                histogram.observe(duration)
+
+    async def run_request_metrics_flusher(self, interval: float = 0.1):
+        """Flush buffered request metrics every interval seconds until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.flush_request_metrics()
+        finally:
+            self.flush_request_metrics()
 
     def record_agent_execution(self, agent_name: str, duration: float, success: bool):
         """Record agent execution metrics"""
         status = "success" if success else "failure"
-        self.agent_execution_time.labels(
-            agent_name=agent_name).observe(duration)
-        self.agent_success_rate.labels(
-            agent_name=agent_name, status=status).inc()
+        self._bound(self.agent_execution_time, agent_name).observe(duration)
+        self._bound(self.agent_success_rate, agent_name, status).inc()
 
     def record_data_source_request(self, source: str, latency: float, success: bool):
         """Record data source request metrics"""
         status = "success" if success else "failure"
-        self.data_source_requests.labels(source=source, status=status).inc()
-        self.data_source_latency.labels(source=source).observe(latency)
+        self._bound(self.data_source_requests, source, status).inc()
+        self._bound(self.data_source_latency, source).observe(latency)
 
     def record_symbol_query(self, symbol: str):
-        """Record unique symbol queries"""
-        current_time = datetime.utcnow()
-        if symbol not in self._symbol_cache:
-            self._symbol_cache[symbol] = current_time
-            self.active_symbols.set(len(self._symbol_cache))
+        """Record unique symbol queries (counted for 24 hours from the first)"""
+        now = time.time()
+        changed = False
 
         # Clean old entries (older than 24 hours)
-        cutoff = current_time.timestamp() - 86400
-        self._symbol_cache = {
-            sym: ts for sym, ts in self._symbol_cache.items()
-            if ts.timestamp() > cutoff
-        }
-        self.active_symbols.set(len(self._symbol_cache))
+        while self._symbol_expiry and self._symbol_expiry[0][0] <= now:
+            _, expired = self._symbol_expiry.popleft()
+            self._live_symbols.discard(expired)
+            changed = True
+
+        if symbol not in self._live_symbols:
+            self._live_symbols.add(symbol)
+            self._symbol_expiry.append((now + 86400, symbol))
+            changed = True
+
+        if changed:
+            self.active_symbols.set(len(self._live_symbols))
 
 
 class PerformanceTracker:
@@ -109,12 +163,12 @@ class PerformanceTracker:
         self.operation_name: str = ""
 
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.start_time:
-            duration = time.time() - self.start_time
+            duration = time.perf_counter() - self.start_time
             success = exc_type is None
 
             if self.operation_name.startswith("agent_"):
@@ -138,6 +192,7 @@ metrics = MetricsCollector()
 def track_performance(operation_name: str):
     """Decorator for tracking performance"""
     def decorator(func):
+        @wraps(func)
         async def wrapper(*args, **kwargs):
             with PerformanceTracker(metrics) as tracker:
                 tracker.set_operation(operation_name)
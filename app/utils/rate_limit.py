@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: bursts of up to capacity calls, refilled at rate
+    tokens per second.
+
+    acquire() returns immediately while tokens are available and otherwise
+    sleeps only as long as needed for the caller's turn. Each caller reserves
+    its slot synchronously (the balance may go negative), so no lock is
+    needed and the bucket can be shared across event loops. A caller
+    cancelled while waiting returns its reserved token.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        """Whether acquire() would return without waiting"""
+        self._refill()
+        return self._tokens >= 1
+
+    async def acquire(self):
+        self._refill()
+        self._tokens -= 1
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / self.rate)
+            except asyncio.CancelledError:
+                # The call never happens, so give its slot back
+                self._tokens += 1
+                raise
@@ -761,8 +761,9 @@ elif st.session_state.phase == "loading":
                             if data_str.strip():
                                 update = json.loads(data_str)
 
-                                # Update progress
-                                progress = update.get('progress', 0)
+                                # Update progress (events without one keep the last value)
+                                progress = update.get(
+                                    'progress', st.session_state.progress)
                                 progress_bar.progress(progress)
                                 st.session_state.progress = progress
 